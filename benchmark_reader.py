@@ -0,0 +1,266 @@
+'''_________________________________________________________________________________
+
+Benchmarks the Network Reader on Synthetic PyPSA Networks
+
+    python benchmark_reader.py --buses 500 --generators 2000 --snapshots 8760 --output results.json
+
+Networks of the requested size are written to a temporary folder, then the loading,
+table and callback paths of network_reader are timed. The results are written as JSON
+so runs can be compared, e.g. before and after a change.
+_________________________________________________________________________________'''
+import argparse
+import contextlib
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pypsa
+import dash
+
+import network_reader as nr
+
+
+
+
+'''     Write Synthetic Networks of a Given Size
+_________________________________________________'''
+def varying_attributes(network, component, count):
+    """The first count input time series attributes of a component."""
+    attrs = network.components[component]['attrs']
+    inputs = attrs[attrs.varying & attrs.status.str.startswith('Input')]
+    return list(inputs.index[:count])
+
+
+def create_network(buses, generators, lines, snapshots, varying, seed=0):
+    rng = np.random.default_rng(seed)
+    network = pypsa.Network()
+    network.set_snapshots(pd.date_range('2030-01-01', periods=snapshots, freq='h'))
+
+    busNames = [f'bus{i}' for i in range(buses)]
+    network.add('Bus', busNames, v_nom=380.0)
+    network.add(
+        'Generator', [f'gen{i}' for i in range(generators)],
+        bus=rng.choice(busNames, generators), p_nom=rng.uniform(10, 500, generators), carrier='gas'
+    )
+    network.add(
+        'Line', [f'line{i}' for i in range(lines)],
+        bus0=rng.choice(busNames, lines), bus1=rng.choice(busNames, lines),
+        x=rng.uniform(0.01, 0.1, lines), s_nom=rng.uniform(100, 1000, lines)
+    )
+    network.add('Load', [f'load{i}' for i in range(buses)], bus=busNames)
+
+    for component in ['Generator', 'Load', 'Line']:
+        list_name = network.components[component]['list_name']
+        names = getattr(network, list_name).index
+        for attr in varying_attributes(network, component, varying):
+            getattr(network, f'{list_name}_t')[attr] = pd.DataFrame(
+                rng.random((snapshots, len(names))), index=network.snapshots, columns=names
+            )
+    return network
+
+
+def write_networks(folder, count, **size):
+    filenames = []
+    for i in range(count):
+        filename = f'synthetic_{i}.h5'
+        create_network(seed=i, **size).export_to_hdf5(Path(folder) / filename)
+        filenames.append(filename)
+    return filenames
+
+
+
+
+'''     Time and Measure a Function
+____________________________________'''
+def measure(name, func, repeat, setup=None):
+    """Run func repeat times (setup first each time), returns its timings, peak memory and payload size."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    # One more run under tracemalloc, which slows it down, to find the peak memory
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'name': name,
+        'repeat': repeat,
+        'seconds_min': min(timings),
+        'seconds_median': statistics.median(timings),
+        'seconds_mean': statistics.mean(timings),
+        'peak_memory_bytes': peak,
+        'payload_bytes': payload_size(result)
+    }
+
+
+def payload_size(result):
+    """Size of the JSON that would be sent to the browser, None for results that are not sent."""
+    if isinstance(result, bytes):
+        return len(result)
+    if isinstance(result, pd.DataFrame):
+        return len(json.dumps(nr.table_records(result), default=str))
+    return None
+
+
+
+
+'''     Call Dash Callbacks through the Server (includes the JSON serialization)
+____________________________________________________________________________'''
+class CallbackClient:
+    def __init__(self):
+        self.client = nr.app.server.test_client()
+        self.dependencies = self.client.get('/_dash-dependencies').get_json()
+
+    def call(self, output_prefix, values, triggered):
+        """POST a callback request and return the response body, values are {'id.property': value}."""
+        dependency = next(d for d in self.dependencies if d['output'].lstrip('.').startswith(output_prefix))
+        outputs = [
+            {'id': output.rsplit('.', 1)[0], 'property': output.rsplit('.', 1)[1]}
+            for output in dependency['output'].strip('.').split('...')
+        ]
+        def spec(items):
+            return [{**item, 'value': values.get(f"{item['id']}.{item['property']}")} for item in items]
+        response = self.client.post('/_dash-update-component', json={
+            'output': dependency['output'],
+            'outputs': outputs if len(outputs) > 1 else outputs[0],
+            'inputs': spec(dependency['inputs']),
+            'state': spec(dependency['state']),
+            'changedPropIds': [triggered]
+        })
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"Callback '{output_prefix}' failed with status {response.status_code}")
+        return response.data
+
+
+
+
+'''     Run the Benchmarks
+___________________________'''
+def run_benchmarks(folder, filenames, args):
+    nr.network_data = network_data = nr.NetworkData(lazy=args.lazy, columnar=args.columnar)
+    nr.job_manager.synchronous = True
+    first = filenames[0]
+    attribute = varying_attributes(pypsa.Network(), 'Generator', 1)[0]
+    results = []
+
+    def clear_cache():
+        network_data.networks = nr.NetworkCache()
+
+    def load_first():
+        clear_cache()
+        network_data.load_network(folder, first)
+
+    def clear_tables():
+        network_data.networks.tables[first] = {}
+
+    results.append(measure('load_network', lambda: network_data.load_network(folder, first), args.repeat, clear_cache))
+    results.append(measure('load_networks', lambda: dict(network_data.load_networks(folder, filenames)), args.repeat, clear_cache))
+
+    load_first()
+    results.append(measure('get_all_static_data.cold', lambda: network_data.get_all_static_data(first, 'Generator'), args.repeat, clear_tables))
+    results.append(measure('get_all_static_data.cached', lambda: network_data.get_all_static_data(first, 'Generator'), args.repeat))
+    results.append(measure('get_varying_data.cold', lambda: network_data.get_varying_data(first, 'Generator', attribute), args.repeat, clear_tables))
+    results.append(measure('get_varying_data.cached', lambda: network_data.get_varying_data(first, 'Generator', attribute), args.repeat))
+
+    client = CallbackClient()
+    selection = {'network-done.n_clicks': 1, 'network-dropdown.value': filenames, 'folder-dropdown.value': str(folder)}
+
+    def load_selected():
+        # The callback only starts a background load job, the timing includes waiting for the job to finish
+        body = client.call('component-dropdown.options', selection, 'network-done.n_clicks')
+        loadJob = json.loads(body)['response']['load-job']['data']
+        job = nr.job_manager.get(loadJob)
+        if job is not None:
+            job.finished.wait()
+            nr.job_manager.forget(loadJob)
+        return body
+
+    results.append(measure('callback.load_selected_network', load_selected, args.repeat, clear_cache))
+
+    view = {
+        'folder-dropdown.value': str(folder), 'network-dropdown.value': filenames,
+        'component-dropdown.value': 'Generator', 'attribute-dropdown.value': attribute
+    }
+    static = {**view, 'datatype-dropdown.value': 'static', 'tableselect-dropdown.value': first}
+    varying = {**view, 'datatype-dropdown.value': 'varying', 'tableselect-dropdown.value': first}
+    plot = {**view, 'datatype-dropdown.value': 'varying', 'plot-done.n_clicks': 1, 'plotselect-dropdown.value': filenames}
+    dict(network_data.load_networks(folder, filenames))
+    for name, values, triggered in [
+        ('callback.display_data.static', static, 'tableselect-dropdown.value'),
+        ('callback.display_data.varying', varying, 'tableselect-dropdown.value'),
+        ('callback.display_data.plot', plot, 'plot-done.n_clicks')
+    ]:
+        results.append(measure(name, lambda: client.call('data-output.children', values, triggered), args.repeat, clear_tables))
+
+    table = {'folder': str(folder), 'network': first, 'component': 'Generator', 'attribute': attribute}
+    page = {'component-table.page_current': 0, 'component-table.page_size': 10, 'table-source.data': table}
+    results.append(measure(
+        'callback.update_table_page', lambda: client.call('component-table.data', page, 'component-table.page_current'), args.repeat
+    ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the network reader on synthetic PyPSA networks.")
+    parser.add_argument('--buses', type=int, default=100)
+    parser.add_argument('--generators', type=int, default=500)
+    parser.add_argument('--lines', type=int, default=200)
+    parser.add_argument('--snapshots', type=int, default=8760)
+    parser.add_argument('--varying', type=int, default=2, help="Time series attributes written per component")
+    parser.add_argument('--networks', type=int, default=2, help="Networks written, all are loaded and plotted")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--lazy', action='store_true', help="Benchmark lazy networks")
+    parser.add_argument('--columnar', action='store_true', help="Benchmark the columnar cache (needs pyarrow)")
+    parser.add_argument('--output', help="JSON file for the results, printed if not given")
+    args = parser.parse_args()
+
+    size = {'buses': args.buses, 'generators': args.generators, 'lines': args.lines, 'snapshots': args.snapshots, 'varying': args.varying}
+    with tempfile.TemporaryDirectory() as root:
+        # The server only reads networks in folders under its root directory
+        nr.ROOT_DIRECTORY = Path(root)
+        folder = Path(root) / 'networks'
+        folder.mkdir()
+        # The reader's progress messages go to stderr so stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            filenames = write_networks(folder, args.networks, **size)
+            results = run_benchmarks(folder, filenames, args)
+
+    report = {
+        'parameters': {**size, 'networks': args.networks, 'repeat': args.repeat, 'lazy': args.lazy, 'columnar': args.columnar},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'pypsa': pypsa.__version__,
+            'dash': dash.__version__
+        },
+        'results': results,
+        'notes': [
+            "peak_memory_bytes is traced in this process only, networks imported by worker processes "
+            "(load_networks and the background load job) are not included."
+        ]
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
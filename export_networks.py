@@ -0,0 +1,115 @@
+'''_________________________________________________________________________________
+
+Exports Component Tables of many Networks without the Web Page
+
+    python export_networks.py SavedNetworks --glob "scenario_*.h5" --components Generator Load --attributes p_max_pu p_set
+
+Every network is exported by a worker process: its static tables and time series are
+written one at a time to <output>/<network>/ and the network is released before the
+worker takes the next one, so memory stays bounded by the workers' networks.
+_________________________________________________________________________________'''
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import network_reader as nr
+
+
+
+
+'''     Export one Network (runs inside the worker processes)
+_______________________________________________________________'''
+def export_network(network_folder, network_filename, output_folder, components, attributes, file_format, aggregation):
+    """Write the requested tables of one network, returns (filename, tables written, seconds)."""
+    start = time.perf_counter()
+    # Lazy networks only read the HDF5 keys that are exported
+    network_data = nr.NetworkData(lazy=True)
+    network = network_data.load_network(network_folder, network_filename)
+    if network is None:
+        raise RuntimeError(f"'{network_filename}' could not be loaded")
+
+    network_output = Path(output_folder) / Path(network_filename).stem
+    network_output.mkdir(parents=True, exist_ok=True)
+    written = 0
+    try:
+        for component in components or list(network.components):
+            if component not in network.components:
+                continue
+            varying = network.varying.get(network.components[component]['list_name'], [])
+            exported = [None] + [attr for attr in varying if attributes is None or attr in attributes]
+            for attr in exported:
+                frame = network_data.get_table_frame(network_filename, component, attr, aggregation=aggregation if attr else None)
+                if frame is None:
+                    continue
+                write_table(frame, network_output / (component if attr is None else f'{component}-{attr}'), file_format)
+                written += 1
+                # Only one table of the network is held at a time
+                network.frames.clear()
+                network_data.networks.tables[network_filename] = {}
+    finally:
+        network_data.networks.pop(network_filename)
+    return network_filename, written, time.perf_counter() - start
+
+
+def write_table(frame, path, file_format):
+    if file_format == 'parquet':
+        frame.to_parquet(f'{path}.parquet')
+    else:
+        frame.to_csv(f'{path}.csv')
+
+
+
+
+'''     Export all Networks in a Process Pool
+________________________________________________'''
+def export_networks(network_folder, pattern, output_folder, components=None, attributes=None,
+                    file_format='parquet', aggregation=None, workers=None):
+    """Export every network matching the glob pattern, yields (filename, tables written, seconds) as each one finishes."""
+    network_filenames = sorted(path.name for path in Path(network_folder).glob(pattern) if path.suffix == '.h5')
+    if not network_filenames:
+        print(f"Warning: No '.h5' networks match '{pattern}' in '{network_folder}'.", file=sys.stderr)
+        return
+    # The workers are started by a fork server that has already imported pypsa and network_reader
+    with ProcessPoolExecutor(max_workers=workers, mp_context=nr.worker_context()) as pool:
+        futures = {
+            pool.submit(export_network, network_folder, network_filename, output_folder, components, attributes, file_format, aggregation): network_filename
+            for network_filename in network_filenames
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"An error occurred while exporting '{futures[future]}': {e}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export component tables and time series of PyPSA networks to Parquet or CSV.")
+    parser.add_argument('folder', help="Folder with the .h5 networks")
+    parser.add_argument('--glob', default='*.h5', help="Networks to export (default: all)")
+    parser.add_argument('--components', nargs='+', help="Components to export, e.g. Generator Line (default: all)")
+    parser.add_argument('--attributes', nargs='+', help="Time series attributes to export, e.g. p_max_pu (default: all)")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--aggregation', choices=[option['value'] for option in nr.aggregation_options()],
+                        help="Resample the time series before exporting, e.g. day-mean")
+    parser.add_argument('--output', default='exported_networks', help="Folder the tables are written to")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Networks exported at once")
+    args = parser.parse_args()
+
+    if args.format == 'parquet' and nr.pa is None:
+        parser.error("Parquet export needs pyarrow, install it or use --format csv.")
+
+    start = time.perf_counter()
+    exported = 0
+    for network_filename, written, seconds in export_networks(
+        args.folder, args.glob, args.output, args.components, args.attributes, args.format, args.aggregation, args.workers
+    ):
+        exported += 1
+        print(f"Exported '{network_filename}': {written} tables ({seconds:.1f} s)")
+    print(f"Exported {exported} networks to '{args.output}' in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
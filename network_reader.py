@@ -12,26 +12,61 @@ _________________________________________'''
 # Extension Imports
 import pandas as pd
 import os
-import pypsa
 import numpy as np
 import dash
 from dash import dcc, html, dash_table
 from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 import threading as th
+import multiprocessing as mp
 import webbrowser as wb
 from pathlib import Path
+from collections import OrderedDict
+import sqlite3
+import json
+import uuid
+import warnings
+import time
+import functools
+import gzip
+import importlib
+import urllib.parse
+import flask
+# pypsa is imported when the first network is read, it is the slowest import by far
+try:
+    # Optional, only needed for the columnar (memory-mapped) network cache and Parquet downloads
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = feather = pq = None
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # Global Variables
-loaded_network = None
-compare_network = None
 hidden = {'display': 'none'}
 visible = {'display': 'block'}
 
 
 Default_Folder = ""
 ROOT_DIRECTORY = Path(__file__).parent
-loading_options = [{'label': 'Loading...', 'value': 'loading'}]
+IndexFilename = '.network_index.sqlite'     # Metadata index kept in each network folder
+IndexVersion = 1                            # Raised when the index tables change, older index files are rebuilt
+CacheFolder = '.network_cache'              # Columnar copies of the networks kept in each network folder
+MaxPlotPoints = 2000        # Most points drawn per trace, the rest are downsampled away
+WebGLTraceThreshold = 100   # Plots with more traces than this are drawn with WebGL
+HeatmapSnapshotBins = 1000  # Most snapshot cells across a heatmap row (about the graph's width in pixels), shared by side-by-side heatmaps
+HeatmapComponentBins = 500  # Most component cells down a heatmap (about the graph's height in pixels)
+BinaryPlotArrays = True     # Plot arrays are sent as base64 typed arrays, set False for clients with an older Plotly.js (applies to every client)
+GzipMinimumSize = 1024      # Smaller responses are not worth compressing
+Compress_Responses = True   # Set by create_app(compress=...) for the whole server, not per client
+DownloadBlockCells = 250000 # Cells converted at a time when a table is streamed as a download
+DownloadRowGroupRows = 1000 # Fewest rows in a Parquet row group, the footer keeps metadata for every row group and column
+ResamplePeriods = {'hour': 'h', 'day': 'D', 'week': 'W', 'month': 'MS'}     # Time series aggregation periods (pandas frequencies)
+ResampleFunctions = ['mean', 'max', 'min', 'sum']
+StatisticPercentiles = [5, 25, 50, 75, 95]    # Percentiles shown in the statistics view
+DiffRelativeTolerance = 1e-6    # Numbers closer than these tolerances are not shown as differences
+DiffAbsoluteTolerance = 1e-9
 
 
 
@@ -43,16 +78,126 @@ The Following Configure the Host and Run the App
 _____________________________________________'''
 app = dash.Dash(__name__, external_stylesheets=[
     "https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap"
-])
+], suppress_callback_exceptions=True)
+dash_thread = None
 def run_dash(): 
     app.run(port=5000,  debug=False)
-def open_app(defaultFolder):
-    global Default_Folder
+def create_app(defaultFolder, lazy=False, memory_budget=None, columnar=False, prefetch=False, compress=True):
+    """Configure and return the Dash app, calling it again only changes the settings (no module reload needed)."""
+    global Default_Folder, Compress_Responses
     Default_Folder = Path(defaultFolder)
-    app.layout['folder-dropdown'].value = Default_Folder.name
-    dash_thread = th.Thread(target=run_dash, daemon=True)
-    dash_thread.start()
+    Compress_Responses = compress
+    network_data.lazy = lazy
+    network_data.columnar = columnar
+    network_prefetcher.enabled = prefetch
+    network_data.networks.budget = memory_budget
+    # Import pypsa in the background while the first page loads
+    th.Thread(target=importlib.import_module, args=('pypsa',), daemon=True).start()
+    return app
+def open_app(defaultFolder, lazy=False, memory_budget=None, columnar=False, prefetch=False, compress=True):
+    global dash_thread
+    create_app(defaultFolder, lazy, memory_budget, columnar, prefetch, compress)
+    # The server keeps running between calls, only the first call starts it
+    if dash_thread is None or not dash_thread.is_alive():
+        dash_thread = th.Thread(target=run_dash, daemon=True)
+        dash_thread.start()
     wb.open("http://127.0.0.1:5000/")
+@app.server.before_request
+def start_request_timer():
+    flask.g.request_start = time.perf_counter()
+@app.server.after_request
+def observe_callback(response):
+    """Record the latency and response size of every Dash callback, labelled with the callback's function name."""
+    if flask.request.path.endswith('/_dash-update-component') and 'request_start' in flask.g:
+        body = flask.request.get_json(silent=True) or {}
+        callback = app.callback_map.get(body.get('output'), {}).get('callback')
+        labels = {'callback': getattr(callback, '__name__', 'unknown')}
+        metrics.observe('network_reader_callback_seconds', labels, time.perf_counter() - flask.g.request_start,
+                        description="Dash callback latency, including the JSON serialization.")
+        metrics.observe('network_reader_callback_response_bytes', labels, response.calculate_content_length() or 0,
+                        buckets=Metrics.BytesBuckets, description="Size of the Dash callback responses as sent (after gzip).")
+    return response
+@app.server.after_request
+def compress_response(response):
+    """Gzip large responses for clients that accept it, other clients get the plain response.
+
+    Dash's own compress=True needs the optional Flask-Compress package and is fixed when the app is built,
+    this hook follows Compress_Responses so create_app can switch it for the whole server.
+    """
+    if (not Compress_Responses or response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or 'gzip' not in flask.request.headers.get('Accept-Encoding', '')):
+        return response
+    data = response.get_data()
+    if len(data) < GzipMinimumSize:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+def checked_table_source(tableSource):
+    """The table source with its folder checked to be under ROOT_DIRECTORY and its networks to be indexed .h5 files in it.
+
+    Returns None for any other folder or file, the source comes from the browser (query string or table-source store).
+    """
+    root = Path(os.path.abspath(ROOT_DIRECTORY))
+    folder = network_folder_path(tableSource['folder'])
+    if root not in folder.parents or not folder.is_dir():
+        return None
+    networks = tableSource.get('networks') or [tableSource.get('network')]
+    networkIndex = network_data.get_index(folder, update=False)
+    for network in networks:
+        # Only bare file names, no paths
+        if not isinstance(network, str) or Path(network).name != network or Path(network).suffix != '.h5':
+            return None
+        if not networkIndex.is_indexed(network):
+            networkIndex.update()
+            if not networkIndex.is_indexed(network):
+                return None
+    return {**tableSource, 'folder': str(folder)}
+
+
+@app.server.route('/download')
+def download_table():
+    """Stream the full table behind the table view (its table-source as JSON in ?source=) as CSV or Parquet."""
+    try:
+        tableSource = checked_table_source(json.loads(flask.request.args.get('source', '')))
+        frame = network_data.get_source_frame(tableSource) if tableSource else None
+    except (ValueError, KeyError, TypeError, AttributeError):
+        frame = None
+    if frame is None:
+        return flask.Response("No table to download.", status=404, mimetype='text/plain')
+
+    file_format = flask.request.args.get('format', 'csv')
+    name = '_'.join(str(part) for part in [
+        tableSource.get('network') or 'networks', tableSource.get('view') or ('diff' if 'networks' in tableSource else None),
+        tableSource['component'], tableSource.get('attribute'), tableSource.get('aggregation')
+    ] if part).replace('.h5', '')
+    if file_format == 'parquet':
+        if pq is None:
+            return flask.Response("Parquet downloads need pyarrow.", status=400, mimetype='text/plain')
+        try:
+            chunks = stream_parquet(frame)
+        except (pa.ArrowException, ValueError, TypeError) as e:
+            return flask.Response(f"The table cannot be stored as Parquet ({e}), download it as CSV instead.", status=400, mimetype='text/plain')
+        mimetype = 'application/vnd.apache.parquet'
+    else:
+        chunks, mimetype, file_format = stream_csv(frame), 'text/csv', 'csv'
+    return flask.Response(chunks, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename="{name}.{file_format}"'})
+@app.server.route('/metrics')
+def serve_metrics():
+    return flask.Response(metrics.render(network_data.networks.stats()), mimetype='text/plain; version=0.0.4')
+def create_server(defaultFolder, memory_budget=None, columnar=True, prefetch=False, max_workers=2, compress=True):
+    """WSGI app factory for a multi-process server, e.g. gunicorn -w 4 'network_reader:create_server("SavedNetworks")'.
+
+    Each worker keeps its own NetworkData, the networks are shared between workers through the
+    memory-mapped columnar cache on disk, so a network is converted once and then mapped by every worker.
+    """
+    create_app(defaultFolder, lazy=True, memory_budget=memory_budget, columnar=columnar, prefetch=prefetch, compress=compress)
+    # Every server worker has its own import processes, keep them few
+    network_data.max_workers = max_workers
+    # The browser's next poll may reach another worker, so plots are built within their request
+    job_manager.synchronous = True
+    return app.server
 
 
 
@@ -68,6 +213,11 @@ _________________________________________________________________'''
 
 '''     Get the Stored Network Files (must be a .h5 file)
 ______________________________________________________________'''
+def network_folder_path(network_folder):
+    """Absolute path of a network folder picked in the UI, the folders are named relative to ROOT_DIRECTORY (not the working directory)."""
+    return Path(os.path.abspath(ROOT_DIRECTORY / str(network_folder)))
+
+
 def list_saved_networks(network_folder):
     """Get a list of saved network files in the specified folder (must be .h5 files)."""
     if network_folder:
@@ -82,29 +232,1173 @@ def list_saved_networks(network_folder):
         return ["No Default"]
 
 
-class NetworkData:
+'''     Map PyPSA list names (e.g. 'generators') to component names (e.g. 'Generator')
+_______________________________________________________________________________________'''
+_component_names = {}
+_static_defaults = {}
+def component_list_names():
+    """Return a dictionary of {list_name: component name} for every PyPSA component type."""
+    if not _component_names:
+        import pypsa
+        components = pypsa.Network().components
+        for component in components.keys():
+            attrs = components[component]['attrs']
+            # The static attributes with their defaults, which a full import adds when they are not stored
+            _static_defaults[component] = attrs.loc[attrs['static'] & (attrs.index != 'name'), ['default', 'dtype']]
+            _component_names[components[component]['list_name']] = component
+    return _component_names
+
+
+def fill_static_defaults(frame, component, columns=None):
+    """Add the static attributes missing from a stored frame with their PyPSA defaults, so it matches a full import."""
+    component_list_names()
+    defaults = _static_defaults.get(component)
+    if defaults is None:
+        return frame
+    if columns is None:
+        order = list(defaults.index) + [c for c in frame.columns if c not in defaults.index]
+    else:
+        order = [c for c in columns if c in frame.columns or c in defaults.index]
+    missing = [c for c in order if c not in frame.columns]
+    if not missing:
+        return frame[order]
+    # String attributes are left to pandas, which gives them its string dtype as a full import does
+    filled = pd.DataFrame(
+        {c: pd.Series(defaults.at[c, 'default'], index=frame.index, dtype=None if defaults.at[c, 'dtype'] == object else defaults.at[c, 'dtype'])
+         for c in missing},
+        index=frame.index
+    )
+    return pd.concat([frame, filled], axis=1)[order]
+
+
+def split_network_key(key, listNames):
+    """Split an HDF5 key into (list_name, attribute), attribute is None for static data. None if not a component."""
+    parts = key.strip('/').split('/')
+    if len(parts) == 1 and parts[0] in listNames:
+        return parts[0], None
+    if len(parts) == 2 and parts[0].endswith('_t') and parts[0][:-2] in listNames:
+        return parts[0][:-2], parts[1]
+    return None
+
+
+'''     Lazy Network Handle (only reads the HDF5 keys that are requested)
+_________________________________________________________________________________'''
+class LazyNetwork:
+    """Network handle that knows its component/attribute inventory and reads HDF5 keys on demand."""
+    def __init__(self, network_path):
+        self.path = str(network_path)
+        self.components = {}
+        self.list_names = {}
+        self.varying = {}
+        self.names = {}
+        self.snapshots = None
+        # Full frames that have been read, kept so table pages do not re-read the file
+        self.frames = {}
+
+        # Only the key listing is read up front, no component data
+        with pd.HDFStore(self.path, mode='r') as store:
+            keys = store.keys()
+        listNames = component_list_names()
+        for key in keys:
+            split = split_network_key(key, listNames)
+            if split is None:
+                continue
+            list_name, attr = split
+            if attr is None:
+                self.components[listNames[list_name]] = {'list_name': list_name}
+                self.list_names[list_name] = listNames[list_name]
+            else:
+                self.varying.setdefault(list_name, []).append(attr)
+
+    def get_snapshots(self, store):
+        """Read the snapshot index once (MultiIndex for multi-period networks)."""
+        if self.snapshots is None and '/snapshots' in store:
+            snapshots = store['/snapshots']
+            levels = sorted({'period', 'timestep', 'snapshot'}.intersection(snapshots.columns))
+            self.snapshots = snapshots.set_index(levels).index if levels else snapshots.index
+        return self.snapshots
+
+    def get_names(self, list_name, store):
+        """Read the component names once, these are needed to label the _t columns."""
+        if list_name not in self.names:
+            self.names[list_name] = pd.Index(store.select('/' + list_name, columns=['name'])['name'])
+        return self.names[list_name]
+
+    def read_static(self, list_name, columns=None):
+        """Read the static DataFrame of a component, optionally only the requested columns."""
+        if list_name not in self.list_names:
+            return None
+        if (list_name, None) in self.frames:
+            frame = self.frames[(list_name, None)]
+            return frame if columns is None else frame[[c for c in columns if c in frame.columns]]
+        with pd.HDFStore(self.path, mode='r') as store:
+            selected = None
+            if columns is not None:
+                stored = store.get_storer('/' + list_name).non_index_axes[0][1]
+                selected = ['name'] + [c for c in columns if c in stored and c != 'name']
+            data = store.select('/' + list_name, columns=selected)
+        data = fill_static_defaults(data.set_index('name'), self.list_names[list_name], columns)
+        data.index.name = self.list_names[list_name]
+        if columns is None:
+            self.frames[(list_name, None)] = data
+        return data
+
+    def read_varying(self, list_name, attr, columns=None, window=None):
+        """Read one time series DataFrame of a component, optionally only the requested component columns.
+
+        With a snapshot window only the rows from its first to its last snapshot are read, the caller selects the window itself.
+        """
+        if attr not in self.varying.get(list_name, []):
+            return None
+        if (list_name, attr) in self.frames:
+            frame = self.frames[(list_name, attr)]
+            return frame if columns is None else frame[[c for c in columns if c in frame.columns]]
+        key = f'/{list_name}_t/{attr}'
+        with pd.HDFStore(self.path, mode='r') as store:
+            stored = pd.Index(store.get_storer(key).non_index_axes[0][1])
+            names = self.get_names(list_name, store)
+
+            # PyPSA stores the _t columns as positions in the static DataFrame
+            positional = stored.dtype.kind in 'iu'
+            if columns is not None:
+                wanted = names.get_indexer(columns) if positional else pd.Index(columns)
+                columns = [c for c in wanted if c in stored]
+            snapshots = self.get_snapshots(store)
+            where = None
+            if window and snapshots is not None and store.get_storer(key).index_axes[0].kind == 'integer':
+                # The rows are stored against snapshot positions, so the window is a range of the stored index
+                positions = window_positions(snapshots, window)
+                if positions is not None:
+                    rows = window_rows(len(snapshots), positions)
+                    where = f'index >= {rows[0]} & index <= {rows[1]}' if rows else 'index < 0'
+            data = store.select(key, where=where, columns=columns)
+            if positional:
+                data.columns = names[data.columns]
+
+        if snapshots is not None and data.index.dtype.kind in 'iu':
+            data.index = snapshots[data.index]
+        data.columns.name = self.list_names[list_name]
+        if columns is None and where is None:
+            self.frames[(list_name, attr)] = data
+        return data
+
+
+'''     Columnar Cache of a Network (memory-mapped Feather files next to the .h5 file)
+_______________________________________________________________________________________'''
+def columnar_cache_path(network_path):
+    network_path = Path(network_path)
+    return network_path.parent / CacheFolder / network_path.name
+
+
+def columnar_file(list_name, attr=None):
+    return f'{list_name}.feather' if attr is None else f'{list_name}_t.{attr}.feather'
+
+
+def read_columnar(path, columns=None, window=None):
+    """Read a Feather file memory-mapped, numeric columns are not copied into memory.
+
+    With a snapshot window only the rows from its first to its last snapshot are converted.
+    """
+    table = feather.read_table(path, memory_map=True)
+    index_columns = [c for c in table.schema.pandas_metadata['index_columns'] if isinstance(c, str)]
+    if columns is not None:
+        table = table.select(index_columns + [c for c in columns if c in table.column_names and c not in index_columns])
+    if window and index_columns:
+        # Only the index columns are converted to find the rows, slicing the mapped table copies nothing
+        index = table.select(index_columns).to_pandas().index
+        positions = window_positions(index, window)
+        if positions is not None:
+            rows = window_rows(len(index), positions)
+            table = table.slice(rows[0], rows[1] - rows[0] + 1) if rows else table.slice(0, 0)
+    return table.to_pandas(split_blocks=True)
+
+
+def convert_network(network_path):
+    """Write every static and varying DataFrame of a .h5 network to uncompressed Feather files, returns the manifest."""
+    cache = columnar_cache_path(network_path)
+    cache.mkdir(parents=True, exist_ok=True)
+    signature = file_signature(network_path)
+    source = LazyNetwork(network_path)
+    cached = []
+    for list_name in source.list_names:
+        for attr in [None] + source.varying.get(list_name, []):
+            frame = source.read_static(list_name) if attr is None else source.read_varying(list_name, attr)
+            try:
+                # Written under a temporary name and renamed, so another process never maps a half-written file
+                filename = cache / columnar_file(list_name, attr)
+                feather.write_feather(pa.Table.from_pandas(frame), f'{filename}.{os.getpid()}.tmp', compression='uncompressed')
+                os.replace(f'{filename}.{os.getpid()}.tmp', filename)
+                cached.append([list_name, attr])
+            except (pa.ArrowException, ValueError, TypeError) as e:
+                # Mixed-type columns cannot be stored, these are still read from the .h5 file
+                print(f"Warning: '{list_name}' '{attr or 'static'}' of '{Path(network_path).name}' is not cached: {e}")
+            source.frames.clear()
+
+    # The manifest is written last, so a conversion that did not finish is never used
+    manifest = {
+        'size': signature[1],
+        'mtime': signature[2],
+        'components': source.components,
+        'varying': source.varying,
+        'cached': cached
+    }
+    (cache / f'manifest.{os.getpid()}.tmp').write_text(json.dumps(manifest))
+    os.replace(cache / f'manifest.{os.getpid()}.tmp', cache / 'manifest.json')
+    return manifest
+
+
+def open_columnar_network(network_path):
+    """Open a network from its columnar cache, converting the .h5 file first if the cache is missing or old."""
+    signature = file_signature(network_path)
+    if signature is None:
+        raise FileNotFoundError(network_path)
+    manifestPath = columnar_cache_path(network_path) / 'manifest.json'
+    manifest = json.loads(manifestPath.read_text()) if manifestPath.exists() else None
+    if manifest is None or (manifest['size'], manifest['mtime']) != signature[1:]:
+        try:
+            manifest = convert_network(network_path)
+        except OSError as e:
+            print(f"Warning: Could not write the columnar cache of '{Path(network_path).name}' ({e}), reading the .h5 file instead.")
+            return LazyNetwork(network_path)
+    return ColumnarNetwork(network_path, manifest)
+
+
+class ColumnarNetwork(LazyNetwork):
+    """Lazy network that reads its DataFrames from the memory-mapped columnar cache instead of the .h5 file."""
+    def __init__(self, network_path, manifest):
+        # The inventory comes from the manifest, the .h5 file is not opened
+        self.path = str(network_path)
+        self.cache = columnar_cache_path(network_path)
+        self.components = manifest['components']
+        self.list_names = {info['list_name']: component for component, info in self.components.items()}
+        self.varying = manifest['varying']
+        self.cached = {(list_name, attr) for list_name, attr in manifest['cached']}
+        self.names = {}
+        self.snapshots = None
+        self.frames = {}
+
+    def read_static(self, list_name, columns=None):
+        if (list_name, None) not in self.cached:
+            return super().read_static(list_name, columns)
+        # Caches written before the defaults were filled in still get them
+        return fill_static_defaults(read_columnar(self.cache / columnar_file(list_name), columns), self.list_names[list_name], columns)
+
+    def read_varying(self, list_name, attr, columns=None, window=None):
+        if (list_name, attr) not in self.cached:
+            return super().read_varying(list_name, attr, columns, window)
+        return read_columnar(self.cache / columnar_file(list_name, attr), columns, window)
+
+
+'''     Read the Metadata of a Network File without Loading its Data
+_______________________________________________________________________'''
+def read_network_metadata(network_path):
+    """Return the components, static columns and names, varying attributes, row counts and snapshot range of a .h5 network."""
+    listNames = component_list_names()
+    metadata = {'components': {}, 'varying': {}, 'snapshots': 0, 'start': None, 'end': None}
+    with pd.HDFStore(str(network_path), mode='r') as store:
+        for key in store.keys():
+            split = split_network_key(key, listNames)
+            if split is None:
+                continue
+            list_name, attr = split
+            storer = store.get_storer(key)
+            columns = [str(c) for c in storer.non_index_axes[0][1] if c != 'name']
+            if attr is None:
+                # Only the 'name' column is read, the key selection lists these names
+                names = [str(name) for name in store.select(key, columns=['name'])['name']]
+                metadata['components'][listNames[list_name]] = {
+                    'list_name': list_name, 'rows': int(storer.nrows), 'columns': columns, 'names': names
+                }
+            else:
+                metadata['varying'].setdefault(listNames[list_name], {})[attr] = len(columns)
+
+        if '/snapshots' in store:
+            rows = int(store.get_storer('/snapshots').nrows)
+            if rows:
+                first = store.select('/snapshots', start=0, stop=1)
+                last = store.select('/snapshots', start=rows - 1, stop=rows)
+                # Multi-period networks are indexed by (period, timestep)
+                column = 'timestep' if 'timestep' in first.columns else 'snapshot' if 'snapshot' in first.columns else None
+                metadata['snapshots'] = rows
+                metadata['start'] = str(first[column].iloc[0] if column else first.index[0])
+                metadata['end'] = str(last[column].iloc[0] if column else last.index[0])
+    return metadata
+
+
+'''     Persistent Metadata Index of a Network Folder (SQLite file next to the networks)
+_________________________________________________________________________________________'''
+class NetworkIndex:
+    """SQLite index of the networks in a folder, only files that changed since the last update are read again."""
+    def __init__(self, network_folder):
+        self.folder = Path(network_folder)
+        self.lock = th.Lock()
+        try:
+            # Worker processes of the server share the index file, writers wait for each other's locks
+            self.db = sqlite3.connect(self.folder / IndexFilename, check_same_thread=False, timeout=30)
+            self.create_tables()
+        except sqlite3.Error as e:
+            # The folder is read-only, keep the index for this session only
+            print(f"Warning: Could not write the network index in '{self.folder}' ({e}), using memory instead.")
+            self.db = sqlite3.connect(':memory:', check_same_thread=False)
+            self.create_tables()
+
+    def create_tables(self):
+        with self.db:
+            # Indexes written by an older version are rebuilt, the index only holds metadata read from the files
+            if self.db.execute('PRAGMA user_version').fetchone()[0] < IndexVersion:
+                self.db.executescript('DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS components; DROP TABLE IF EXISTS varying;')
+                self.db.execute(f'PRAGMA user_version = {IndexVersion}')
+            self.db.executescript('''
+                CREATE TABLE IF NOT EXISTS files (
+                    filename TEXT PRIMARY KEY, size INTEGER, mtime INTEGER,
+                    snapshots INTEGER, snapshot_start TEXT, snapshot_end TEXT
+                );
+                CREATE TABLE IF NOT EXISTS components (
+                    filename TEXT, component TEXT, list_name TEXT, rows INTEGER, columns TEXT, names TEXT,
+                    PRIMARY KEY (filename, component)
+                );
+                CREATE TABLE IF NOT EXISTS varying (
+                    filename TEXT, component TEXT, attribute TEXT, columns INTEGER,
+                    PRIMARY KEY (filename, component, attribute)
+                );
+            ''')
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    '''     Index new or modified .h5 files and forget deleted ones
+    ___________________________________________________________________'''
+    def update(self):
+        network_files = [f.name for f in self.folder.iterdir() if f.suffix == '.h5'] if self.folder.exists() else []
+        indexed = {filename: (size, mtime) for filename, size, mtime in self.query('SELECT filename, size, mtime FROM files')}
+
+        for network_filename in network_files:
+            signature = file_signature(self.folder / network_filename)
+            if signature is None or indexed.get(network_filename) == signature[1:]:
+                continue
+            try:
+                metadata = read_network_metadata(self.folder / network_filename)
+            except Exception as e:
+                print(f"Error: Could not index the network '{network_filename}': {e}")
+                continue
+            self.write(network_filename, signature, metadata)
+
+        deleted = set(indexed) - set(network_files)
+        with self.lock, self.db:
+            for network_filename in deleted:
+                self.forget(network_filename)
+        return network_files
+
+    def forget(self, network_filename):
+        for table in ('files', 'components', 'varying'):
+            self.db.execute(f'DELETE FROM {table} WHERE filename = ?', (network_filename,))
+
+    def write(self, network_filename, signature, metadata):
+        with self.lock, self.db:
+            self.forget(network_filename)
+            self.db.execute(
+                'INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                (network_filename, signature[1], signature[2], metadata['snapshots'], metadata['start'], metadata['end'])
+            )
+            self.db.executemany(
+                'INSERT INTO components VALUES (?, ?, ?, ?, ?, ?)',
+                [(network_filename, component, info['list_name'], info['rows'], json.dumps(info['columns']), json.dumps(info['names']))
+                 for component, info in metadata['components'].items()]
+            )
+            self.db.executemany(
+                'INSERT INTO varying VALUES (?, ?, ?, ?)',
+                [(network_filename, component, attr, columns)
+                 for component, attrs in metadata['varying'].items() for attr, columns in attrs.items()]
+            )
+
+    '''     Look up the Indexed Metadata
+    _________________________________________'''
+    def is_indexed(self, network_filename):
+        return bool(self.query('SELECT 1 FROM files WHERE filename = ?', (network_filename,)))
+
+    def get_components(self, network_filename):
+        """Components stored in a network, None if the network is not indexed."""
+        if not self.is_indexed(network_filename):
+            return None
+        return [row[0] for row in self.query('SELECT component FROM components WHERE filename = ?', (network_filename,))]
+
+    def get_static_columns(self, network_filename, component):
+        rows = self.query('SELECT columns FROM components WHERE filename = ? AND component = ?', (network_filename, component))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_component_names(self, network_filename, component):
+        """Names of a component's rows (e.g. the generators), None if the network or component is not indexed."""
+        rows = self.query('SELECT names FROM components WHERE filename = ? AND component = ?', (network_filename, component))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_varying_attributes(self, network_filename, component):
+        if not self.is_indexed(network_filename):
+            return None
+        rows = self.query('SELECT attribute FROM varying WHERE filename = ? AND component = ?', (network_filename, component))
+        return [row[0] for row in rows]
+
+    def get_snapshot_range(self, network_filename):
+        rows = self.query('SELECT snapshots, snapshot_start, snapshot_end FROM files WHERE filename = ?', (network_filename,))
+        return rows[0] if rows else None
+
+
+'''     Measure the Memory Held by a Network (bytes of its DataFrames)
+_________________________________________________________________________'''
+def network_memory(network):
+    """Return the memory footprint in bytes of the DataFrames held by a full or lazy network."""
+    if network is None:
+        return 0
+    if isinstance(network, LazyNetwork):
+        indexes = list(network.names.values())
+        if network.snapshots is not None:
+            indexes.append(network.snapshots)
+        frames = sum(frame.memory_usage(deep=True).sum() for frame in network.frames.values())
+        return int(frames + sum(index.memory_usage(deep=True) for index in indexes))
+    total = 0
+    for component in network.iterate_components():
+        total += component.df.memory_usage(deep=True).sum()
+        for frame in component.pnl.values():
+            total += frame.memory_usage(deep=True).sum()
+    return int(total)
+
+
+'''     File Signature used to Validate Cached Networks
+_____________________________________________________________'''
+def file_signature(network_path):
+    """Return the (path, size, mtime) of a network file, or None if it does not exist."""
+    try:
+        stat = os.stat(network_path)
+    except OSError:
+        return None
+    return (os.path.abspath(network_path), stat.st_size, stat.st_mtime_ns)
+
+
+'''     Timing Histograms and Counters, served in the Prometheus text format on /metrics
+_________________________________________________________________________________________'''
+class Metrics:
+    """Thread-safe histograms and counters of this process (each server worker has its own)."""
+    SecondsBuckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    BytesBuckets = [1e3, 1e4, 1e5, 1e6, 1e7, 1e8]
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.help = {}
+        self.lock = th.Lock()
+
+    def observe(self, name, labels, value, buckets=SecondsBuckets, description=""):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.help.setdefault(name, description)
+            histogram = self.histograms.setdefault(name, {}).setdefault(key, {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def increment(self, name, labels, amount=1, description=""):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.help.setdefault(name, description)
+            counters = self.counters.setdefault(name, {})
+            counters[key] = counters.get(key, 0) + amount
+
+    def timed(self, func):
+        """Decorator that observes the run time of func in network_reader_function_seconds."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe('network_reader_function_seconds', {'function': func.__name__}, time.perf_counter() - start,
+                             description="Run time of the reader's data functions.")
+        return wrapper
+
+    def render(self, cache_stats=None):
+        """Prometheus text exposition of every metric, plus the network cache counters if given."""
+        lines = []
+        def labels_text(key, extra=()):
+            labels = list(key) + list(extra)
+            return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}' if labels else ''
+
+        with self.lock:
+            for name, series in sorted(self.histograms.items()):
+                lines += [f'# HELP {name} {self.help[name]}', f'# TYPE {name} histogram']
+                for key, histogram in series.items():
+                    for bound, count in zip(histogram['buckets'], histogram['counts']):
+                        lines.append(f'{name}_bucket{labels_text(key, [("le", f"{bound:g}")])} {count}')
+                    lines.append(f'{name}_bucket{labels_text(key, [("le", "+Inf")])} {histogram["count"]}')
+                    lines.append(f'{name}_sum{labels_text(key)} {histogram["sum"]}')
+                    lines.append(f'{name}_count{labels_text(key)} {histogram["count"]}')
+            for name, series in sorted(self.counters.items()):
+                lines += [f'# HELP {name} {self.help[name]}', f'# TYPE {name} counter']
+                lines += [f'{name}{labels_text(key)} {value}' for key, value in series.items()]
+
+        if cache_stats is not None:
+            for stat in ['hits', 'misses', 'evictions']:
+                lines += [f'# TYPE network_reader_network_cache_{stat}_total counter', f'network_reader_network_cache_{stat}_total {cache_stats[stat]}']
+            for stat in ['entries', 'memory', 'budget']:
+                if cache_stats[stat] is not None:
+                    name = f'network_reader_network_cache_{stat}' + ('_bytes' if stat != 'entries' else '')
+                    lines += [f'# TYPE {name} gauge', f'{name} {cache_stats[stat]}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+'''     Network Cache with a Memory Budget, LRU Eviction and Pinning
+_________________________________________________________________________'''
+class NetworkCache:
+    """Dictionary-like store of loaded networks that evicts the least recently used ones over a memory budget."""
+    def __init__(self, budget=None):
+        # budget is in bytes, None means the cache is never evicted
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.sizes = {}
+        # Sanitized tables built from each network, dropped with the network
+        self.tables = {}
+        # Networks pinned by each view of the UI (selection, table, plot), the union is never evicted
+        self.pins = {}
+        self.pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = th.RLock()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def keys(self):
+        return list(self.entries.keys())
+
+    def peek(self, key, default=None):
+        """Get a network without counting a hit or changing its LRU position."""
+        return self.entries.get(key, default)
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+            return default
+
+    def __setitem__(self, key, network):
+        with self.lock:
+            self.entries[key] = network
+            self.entries.move_to_end(key)
+            self.tables[key] = {}
+            self.sizes[key] = network_memory(network)
+            self.evict(keep=key)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            self.sizes.pop(key, None)
+            self.tables.pop(key, None)
+            return self.entries.pop(key, default)
+
+    def get_table(self, key, table_key):
+        with self.lock:
+            return self.tables.get(key, {}).get(table_key)
+
+    def set_table(self, key, table_key, table):
+        """Keep a table built from a cached network, counted in that network's memory."""
+        with self.lock:
+            if key in self.entries:
+                self.tables[key][table_key] = table
+                self.resize(key)
+
+    def resize(self, key):
+        """Measure a network again after it has grown (e.g. a lazy network read a frame or a table was cached)."""
+        with self.lock:
+            if key in self.entries:
+                tables = sum(table.memory_usage(deep=True).sum() for table in self.tables[key].values())
+                self.sizes[key] = network_memory(self.entries[key]) + int(tables)
+                self.evict(keep=key)
+
+    def pin(self, keys, view='selection'):
+        """Pin the networks a view of the UI currently shows so they are never evicted, replacing only that view's pins."""
+        with self.lock:
+            self.pins[view] = set(keys or []) - {None}
+            self.pinned = set().union(*self.pins.values())
+            self.evict()
+
+    def memory(self):
+        return sum(self.sizes.values())
+
+    def evict(self, keep=None):
+        """Evict least recently used, unpinned networks until the cache fits in the budget."""
+        if self.budget is None:
+            return
+        with self.lock:
+            for key in list(self.entries):
+                if self.memory() <= self.budget:
+                    break
+                if key in self.pinned or key == keep:
+                    continue
+                self.pop(key)
+                self.evictions += 1
+                print(f"Network '{key}' evicted from the cache.")
+
+    def stats(self):
+        """Return the cache counters so the memory budget can be sized."""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'memory': self.memory(),
+                'budget': self.budget,
+                'pinned': sorted(self.pinned),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def observe_import(start):
+    metrics.observe('network_reader_function_seconds', {'function': 'import_network'}, time.perf_counter() - start,
+                    description="Run time of the reader's data functions.")
+
+
+'''     Start the Worker Processes from a Clean Process, not a Fork of the Threaded Server
+_____________________________________________________________________________________________'''
+def worker_context():
+    """Multiprocessing context of the import workers, a fork of the threaded server could copy a held HDF5, SQLite or logging lock and deadlock."""
+    if 'forkserver' not in mp.get_all_start_methods():
+        return mp.get_context('spawn')
+    context = mp.get_context('forkserver')
+    # pypsa and this module are imported once by the fork server instead of by every worker
+    context.set_forkserver_preload(['pypsa'] + ([__name__] if __name__ != '__main__' else []))
+    return context
+
+
+'''     Import a Network File (also runs inside the worker processes)
+_______________________________________________________________________'''
+def import_network(network_path, lazy=False, columnar=False):
+    """Import a network from a .h5 file, either fully, as a lazy handle or from its columnar cache."""
+    if columnar:
+        if feather is not None:
+            return open_columnar_network(network_path)
+        print("Warning: pyarrow is not installed, the columnar cache is not used.")
+        lazy = True
+    if lazy:
+        # Only read the component/attribute inventory of the network
+        return LazyNetwork(network_path)
+    # Initialize a new PyPSA Network and load data
+    import pypsa
+    network = pypsa.Network()
+    network.import_from_hdf5(network_path)
+    return network
+
+
+'''     Server-Side Filtering and Sorting of Table Data (DataTable custom actions)
+____________________________________________________________________________________'''
+filter_operators = [['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'], ['ne ', '!='], ['eq ', '='], ['contains '], ['datestartswith ']]
+
+def split_filter_part(filter_part):
+    """Split one part of a DataTable filter query into (column, operator, value)."""
+    for operator_type in filter_operators:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return [None] * 3
+
+
+def table_column(frame, column):
+    """Get a column of the table, which can also be one of the index levels."""
+    if column in frame.columns:
+        return frame[column]
+    if column in frame.index.names:
+        return pd.Series(frame.index.get_level_values(column), index=frame.index)
+    return None
+
+
+def filter_table(frame, filter_query):
+    """Apply a DataTable filter query to a DataFrame as vectorized boolean masks."""
+    if not filter_query:
+        return frame
+    mask = np.ones(len(frame), dtype=bool)
+    for filter_part in filter_query.split(' && '):
+        name, operator, value = split_filter_part(filter_part)
+        column = table_column(frame, name)
+        if column is None:
+            continue
+        text = f'{value:g}' if isinstance(value, float) else str(value)
+        if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+            if not isinstance(value, float) or not pd.api.types.is_numeric_dtype(column):
+                # Compare as text when the column or value is not numeric
+                column, value = column.astype(str), text
+            compare = {'eq': column.eq, 'ne': column.ne, 'lt': column.lt, 'le': column.le, 'gt': column.gt, 'ge': column.ge}
+            mask &= compare[operator](value).to_numpy()
+        elif operator == 'contains':
+            mask &= column.astype(str).str.contains(text, regex=False).to_numpy()
+        elif operator == 'datestartswith':
+            mask &= column.astype(str).str.startswith(text).to_numpy()
+    return frame[mask]
+
+
+def sort_table(frame, sort_by):
+    """Sort a DataFrame by the DataTable sort_by list (columns or index levels)."""
+    if not sort_by:
+        return frame
+    sort_by = [col for col in sort_by if col['column_id'] in frame.columns or col['column_id'] in frame.index.names]
+    if not sort_by:
+        return frame
+    return frame.sort_values(
+        [col['column_id'] for col in sort_by],
+        ascending=[col['direction'] == 'asc' for col in sort_by],
+        kind='stable'
+    )
+
+
+def table_columns(frame):
+    """Column names shown in the table, the index is shown as the first column/s."""
+    return [name if name is not None else 'index' for name in frame.index.names] + [str(col) for col in frame.columns]
+
+
+@metrics.timed
+def sanitize_table(frame):
+    """Move the index into columns and mask inf to NaN (empty cells) without converting numbers to objects."""
+    table = frame.reset_index()
+    table.columns = table_columns(frame)
+    floats = table.columns[[pd.api.types.is_float_dtype(dtype) for dtype in table.dtypes]]
+    if len(floats):
+        values = table[floats].to_numpy()
+        infinite = np.isinf(values)
+        # Only the columns that contain inf are rewritten
+        columns = infinite.any(axis=0)
+        if columns.any():
+            table[floats[columns]] = np.where(infinite[:, columns], np.nan, values[:, columns])
+    return table
+
+
+@metrics.timed
+def table_records(table):
+    """Convert a (small) table to records with NaN as None, so it is null in JSON."""
+    return table.astype(object).where(table.notna(), None).to_dict('records')
+
+
+def table_page(table, page_current, page_size, sort_by=None, filter_query=''):
+    """Filter and sort a table, returns (records, page_count) of the requested page."""
+    if table is None:
+        return [], 1
+    table = sort_table(filter_table(table, filter_query), sort_by)
+    page = table.iloc[page_current * page_size:(page_current + 1) * page_size]
+    page_count = max(1, -(-len(table) // page_size))
+    return table_records(page), page_count
+
+
+'''     Stream a Table as CSV or Parquet, one Block of Rows at a Time
+_____________________________________________________________________'''
+def download_blocks(frame, minimum_rows=1):
+    """Yield the frame in blocks of rows of about DownloadBlockCells cells."""
+    rows = max(minimum_rows, DownloadBlockCells // max(1, len(frame.columns)))
+    for start in range(0, len(frame), rows):
+        yield frame.iloc[start:start + rows]
+
+
+def download_index(frame):
+    # Tables that already have their index as columns (diffs, statistics) are written without it
+    return not isinstance(frame.index, pd.RangeIndex) or frame.index.name is not None
+
+
+def stream_csv(frame):
+    index = download_index(frame)
+    yield frame.iloc[:0].to_csv(index=index)
+    for block in download_blocks(frame):
+        yield block.to_csv(header=False, index=index)
+
+
+class DownloadStream:
+    """Write-only file for the Parquet writer that hands out the bytes written since they were last taken."""
     def __init__(self):
-        # Dictionary to hold multiple networks
-        self.networks = {}
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        # The writer records file offsets in the footer, so the position counts everything written
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(frame):
+    """Return a generator of the Parquet file with one row group per block, raises if the frame cannot be stored."""
+    index = download_index(frame)
+    blocks = download_blocks(frame, DownloadRowGroupRows)
+    # The first block is converted before streaming starts, so unsupported columns are an error and not a broken file
+    first = pa.Table.from_pandas(next(blocks, frame), preserve_index=index)
+    def generate():
+        stream = DownloadStream()
+        with pq.ParquetWriter(stream, first.schema) as writer:
+            writer.write_table(first)
+            yield stream.take()
+            for block in blocks:
+                writer.write_table(pa.Table.from_pandas(block, schema=first.schema, preserve_index=index))
+                yield stream.take()
+        yield stream.take()
+    return generate()
+
+
+'''     Compare the Static Data of Several Networks in one Vectorized Pass
+___________________________________________________________________________'''
+@metrics.timed
+def diff_static_frames(frames, rtol=DiffRelativeTolerance, atol=DiffAbsoluteTolerance):
+    """Compare the static frames ({network: frame}) with the first one, returns only the rows and columns that differ."""
+    names = list(frames)
+    index = frames[names[0]].index
+    columns = frames[names[0]].columns
+    for frame in list(frames.values())[1:]:
+        index = index.union(frame.index, sort=False)
+        columns = columns.union(frame.columns, sort=False)
+    aligned = [frame.reindex(index=index, columns=columns) for frame in frames.values()]
+    # Which network has which row (rows x networks)
+    present = np.stack([index.isin(frame.index) for frame in frames.values()], axis=1)
+    numeric = np.array([all(pd.api.types.is_numeric_dtype(frame[column]) for frame in aligned) for column in columns], dtype=bool)
+
+    base = aligned[0]
+    changed = np.zeros((len(index), len(columns)), dtype=bool)
+    for position, frame in enumerate(aligned[1:], start=1):
+        # Only rows both networks have can have changed cells, the others are added or removed
+        shared = (present[:, 0] & present[:, position])[:, None]
+        if numeric.any():
+            x, y = base.loc[:, numeric].to_numpy(dtype=float), frame.loc[:, numeric].to_numpy(dtype=float)
+            changed[:, numeric] |= ~np.isclose(x, y, rtol=rtol, atol=atol, equal_nan=True) & shared
+        if not numeric.all():
+            x, y = base.loc[:, ~numeric].to_numpy(dtype=object), frame.loc[:, ~numeric].to_numpy(dtype=object)
+            changed[:, ~numeric] |= ~((x == y) | (pd.isna(x) & pd.isna(y))) & shared
+
+    rows = changed.any(axis=1) | ~present.all(axis=1)
+    status = []
+    for rowChanged, rowPresent in zip(changed[rows].any(axis=1), present[rows]):
+        added = [name for name, here in zip(names[1:], rowPresent[1:]) if here and not rowPresent[0]]
+        removed = [name for name, here in zip(names[1:], rowPresent[1:]) if not here and rowPresent[0]]
+        status.append("; ".join(
+            ([f"added in {', '.join(added)}"] if added else []) +
+            ([f"removed in {', '.join(removed)}"] if removed else []) +
+            (["changed"] if rowChanged else [])
+        ))
+
+    # Every differing column is shown once per network, side by side
+    diff = {'status': status}
+    for column in columns[changed[rows].any(axis=0)]:
+        for name, frame in zip(names, aligned):
+            diff[f"{column} ({name})"] = frame[column].to_numpy()[rows]
+    return pd.DataFrame(diff, index=index[rows])
+
+
+'''     Summary Statistics of every Column of a Time Series
+_____________________________________________________________'''
+@metrics.timed
+def summarize_frame(frame):
+    """Statistics of each column (rows) computed with one NumPy reduction per statistic, NaN are ignored."""
+    values = frame.to_numpy(dtype=float)
+    if not len(values):
+        values = np.full((1, len(frame.columns)), np.nan)
+    with warnings.catch_warnings():
+        # Columns that are all NaN give NaN statistics
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        peak = np.nanmax(values, axis=0)
+        mean = np.nanmean(values, axis=0)
+        statistics = {
+            'count': np.count_nonzero(~np.isnan(values), axis=0),
+            'mean': mean,
+            'std': np.nanstd(values, axis=0),
+            'min': np.nanmin(values, axis=0),
+            **dict(zip([f'p{q}' for q in StatisticPercentiles], np.nanpercentile(values, StatisticPercentiles, axis=0))),
+            'max': peak,
+            'sum': np.nansum(values, axis=0),
+            # Capacity-factor style ratio of the average to the peak
+            'mean/max': np.divide(mean, peak, out=np.full_like(mean, np.nan), where=peak != 0)
+        }
+    return pd.DataFrame(statistics, index=frame.columns)
+
+
+def combine_statistics(statistics):
+    """Stack the statistics of several networks ({network: statistics}) into (key, statistic) rows with a column per network."""
+    combined = pd.concat({network: frame.stack() for network, frame in statistics.items()}, axis=1)
+    combined.index.names = ['key', 'statistic']
+    return combined
+
+
+'''     Aggregate a Time Series on the Server (resampled or as a duration curve)
+_________________________________________________________________________________'''
+def aggregation_options():
+    options = [
+        {'label': f"{period.capitalize()} {function}", 'value': f"{period}-{function}"}
+        for period in ResamplePeriods for function in ResampleFunctions
+    ]
+    return options + [{'label': 'Duration curve', 'value': 'duration'}]
+
+
+@metrics.timed
+def aggregate_frame(frame, rule):
+    """Resample a time series by a '<period>-<function>' rule (e.g. 'day-max') or sort it into a 'duration' curve."""
+    if rule == 'duration':
+        # Every column sorted from high to low on its own, NaN last
+        values = -np.sort(-frame.to_numpy(dtype=float), axis=0)
+        return pd.DataFrame(values, index=pd.RangeIndex(len(frame), name='rank'), columns=frame.columns)
+
+    period, function = rule.split('-')
+    timesteps = frame.index.get_level_values(-1)
+    if not pd.api.types.is_datetime64_any_dtype(timesteps):
+        print(f"Warning: The snapshots are not dates, the time series cannot be aggregated by {period}.")
+        return frame
+    if isinstance(frame.index, pd.MultiIndex):
+        # Multi-period snapshots are resampled within each investment period
+        groups = frame.groupby([pd.Grouper(level=0), pd.Grouper(level=frame.index.nlevels - 1, freq=ResamplePeriods[period])])
+    else:
+        groups = frame.resample(ResamplePeriods[period])
+    return groups.agg(function)
+
+
+'''     Select a Window of Snapshots by Binary Search on the Sorted Timesteps
+_____________________________________________________________________________'''
+def window_positions(index, window):
+    """Rows of the snapshot index inside the window [start, stop), None if the snapshots are not dates.
+
+    Sorted timesteps give a slice, multi-period snapshots are searched within every investment period.
+    """
+    timesteps = index.get_level_values(-1)
+    if not pd.api.types.is_datetime64_any_dtype(timesteps):
+        return None
+    bounds = []
+    for value in window:
+        bound = pd.Timestamp(value) if value else None
+        if bound is not None and timesteps.tz is not None and bound.tz is None:
+            bound = bound.tz_localize(timesteps.tz)
+        bounds.append(bound)
+    start, stop = bounds
+
+    def search(values, offset=0):
+        first = values.searchsorted(start, 'left') if start is not None else 0
+        last = values.searchsorted(stop, 'left') if stop is not None else len(values)
+        return offset + first, offset + max(first, last)
+
+    if timesteps.is_monotonic_increasing:
+        return slice(*search(timesteps))
+    if isinstance(index, pd.MultiIndex) and index.is_monotonic_increasing:
+        # Every period repeats its own sorted timesteps
+        periods = index.codes[0]
+        edges = np.concatenate([[0], np.flatnonzero(periods[1:] != periods[:-1]) + 1, [len(index)]])
+        return np.concatenate([np.arange(*search(timesteps[a:b], a)) for a, b in zip(edges[:-1], edges[1:])])
+    inside = np.ones(len(timesteps), dtype=bool)
+    if start is not None:
+        inside &= timesteps >= start
+    if stop is not None:
+        inside &= timesteps < stop
+    return np.flatnonzero(inside)
+
+
+def select_window(frame, window):
+    """Rows of a time series inside the snapshot window, the whole frame if there is no window."""
+    if not window or not isinstance(frame, pd.DataFrame):
+        return frame
+    positions = window_positions(frame.index, window)
+    if positions is None:
+        print("Warning: The snapshots are not dates, the snapshot window is not applied.")
+        return frame
+    return frame.iloc[positions]
+
+
+def window_rows(length, positions):
+    """First and last row (inclusive) of the window positions in an index of the given length, None if there are no rows."""
+    rows = np.arange(length)[positions]
+    return (int(rows.min()), int(rows.max())) if len(rows) else None
+
+
+class NetworkData:
+    def __init__(self, lazy=False, memory_budget=None, max_workers=None, columnar=False):
+        # Cache to hold multiple networks (LRU eviction over memory_budget bytes)
+        self.networks = NetworkCache(memory_budget)
+        # Lazy networks only read the HDF5 keys that are requested
+        self.lazy = lazy
+        # Columnar networks are read from memory-mapped Feather copies of the .h5 files
+        self.columnar = columnar
+        # File signatures of the cached networks, used to detect changes on disk
+        self.signatures = {}
+        # Worker processes for loading several networks at once (created on first use)
+        self.max_workers = max_workers
+        self.pool = None
+        # Imports running in the worker processes, shared so a network is never imported twice at once
+        self.loading = {}
+        # Metadata index of each network folder
+        self.indexes = {}
 
     '''     Load and store multiple networks by filename 
     ___________________________________________________________________'''
     def load_network(self, network_folder, network_filename):
+        network_path = os.path.join(network_folder, network_filename)
+        self.signatures[network_filename] = file_signature(network_path)
+        start = time.perf_counter()
         try:
-            # Initialize a new PyPSA Network and load data
-            network = pypsa.Network()
-            network_path = os.path.join(network_folder, network_filename)
-            network.import_from_hdf5(network_path)
-            
-            # Store the network in the dictionary with the filename as the key
-            self.networks[network_filename] = network
+            network = import_network(network_path, self.lazy, self.columnar)
+        except Exception as e:
+            network = self.import_failed(network_folder, network_filename, e)
+        observe_import(start)
+        return self.store_network(network_filename, network)
+
+    def store_network(self, network_filename, network):
+        # Store the network in the cache with the filename as the key
+        self.networks[network_filename] = network
+        if network is not None:
             print(f"Network '{network_filename}' loaded successfully.")
-        except FileNotFoundError:
+        return network
+
+    def import_failed(self, network_folder, network_filename, error):
+        if isinstance(error, FileNotFoundError):
             print(f"Error: The network file '{network_filename}' does not exist in '{network_folder}'.")
-            self.networks[network_filename] = None
+        else:
+            print(f"An error occurred while loading the network: {error}")
+        return None
+
+    '''     Check a cached network is still valid, dropping it when the file changed
+    ___________________________________________________________________________________'''
+    def is_cached(self, network_folder, network_filename):
+        network_path = os.path.join(network_folder, network_filename)
+        if network_filename in self.networks and self.signatures.get(network_filename) != file_signature(network_path):
+            # The file was modified, moved or another folder is selected so the cached network is stale
+            self.networks.pop(network_filename)
+        return network_filename in self.networks
+
+    '''     Get a network from the cache, loading it only when it is missing or the file changed
+    ___________________________________________________________________________________________'''
+    def ensure_network(self, network_folder, network_filename):
+        if self.is_cached(network_folder, network_filename):
+            return self.networks.get(network_filename)
+        self.networks.misses += 1
+        if network_filename in self.loading:
+            # Already being imported (e.g. prefetched), wait for it instead of importing again
+            return self.collect_network(network_folder, network_filename, self.loading[network_filename])
+        return self.load_network(network_folder, network_filename)
+
+    '''     Import networks in the worker processes
+    ______________________________________________________'''
+    def get_pool(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=worker_context())
+        return self.pool
+
+    def submit_network(self, network_folder, network_filename):
+        """Start importing a network in a worker process, returns the Future (shared if already running)."""
+        with self.networks.lock:
+            if network_filename not in self.loading:
+                network_path = os.path.join(network_folder, network_filename)
+                self.signatures[network_filename] = file_signature(network_path)
+                self.loading[network_filename] = self.get_pool().submit(import_network, network_path, self.lazy, self.columnar)
+                # Timed from submission, so the time waiting for a free worker is included
+                start = time.perf_counter()
+                self.loading[network_filename].add_done_callback(lambda future: observe_import(start))
+            return self.loading[network_filename]
+
+    def collect_network(self, network_folder, network_filename, future):
+        """Wait for an import started by submit_network and store the network (only once per import)."""
+        try:
+            network = future.result()
         except Exception as e:
-            print(f"An error occurred while loading the network: {e}")
-            self.networks[network_filename] = None
+            if isinstance(e, BrokenProcessPool):
+                # A worker died, start a fresh pool on the next load
+                self.pool = None
+            network = self.import_failed(network_folder, network_filename, e)
+        with self.networks.lock:
+            if self.loading.get(network_filename) is not future:
+                # Another caller waiting on the same import has stored it already
+                return self.networks.peek(network_filename)
+            self.loading.pop(network_filename)
+            return self.store_network(network_filename, network)
+
+    '''     Load several networks in parallel, yielding each one as soon as it is ready
+    ___________________________________________________________________________________'''
+    def load_networks(self, network_folder, network_filenames):
+        """Yield (filename, network) for each network, importing the uncached ones in worker processes."""
+        toLoad = []
+        for network_filename in network_filenames:
+            if self.is_cached(network_folder, network_filename):
+                yield network_filename, self.networks.get(network_filename)
+            else:
+                self.networks.misses += 1
+                toLoad.append(network_filename)
+
+        # Lazy handles and single files are cheap enough to load in this process (columnar files may need converting)
+        if (self.lazy and not self.columnar) or len(toLoad) < 2:
+            for network_filename in toLoad:
+                if network_filename in self.loading:
+                    yield network_filename, self.collect_network(network_folder, network_filename, self.loading[network_filename])
+                else:
+                    yield network_filename, self.load_network(network_folder, network_filename)
+            return
+
+        futures = {self.submit_network(network_folder, network_filename): network_filename for network_filename in toLoad}
+        try:
+            for future in as_completed(futures):
+                network_filename = futures[future]
+                yield network_filename, self.collect_network(network_folder, network_filename, future)
+        finally:
+            # The caller stopped early (e.g. a cancelled job), drop the imports that have not started
+            for future, network_filename in futures.items():
+                if not future.done():
+                    self.cancel_network(network_filename, future)
+
+    def cancel_network(self, network_filename, future):
+        """Cancel an import that has not started yet, running imports finish and are stored by the next caller."""
+        with self.networks.lock:
+            if future.cancel() and self.loading.get(network_filename) is future:
+                self.loading.pop(network_filename)
+
+    '''     Warm a network in the background without counting it as a cache hit or miss
+    ___________________________________________________________________________________'''
+    def prefetch_network(self, network_folder, network_filename):
+        if self.is_cached(network_folder, network_filename):
+            return self.networks.peek(network_filename)
+        if self.lazy and not self.columnar:
+            return self.load_network(network_folder, network_filename)
+        return self.collect_network(network_folder, network_filename, self.submit_network(network_folder, network_filename))
+
+    '''     Get the metadata index of a folder, updated for new or modified files
+    _________________________________________________________________________________'''
+    def get_index(self, network_folder, update=True):
+        folder = Path(network_folder).resolve()
+        if folder not in self.indexes:
+            self.indexes[folder] = NetworkIndex(folder)
+        if update:
+            self.indexes[folder].update()
+        return self.indexes[folder]
 
     '''     Get a specific network by filename
     ___________________________________________________________________'''
@@ -112,22 +1406,49 @@ class NetworkData:
         # Return the network object if it exists, otherwise return None
         return self.networks.get(network_filename)
 
-    '''     Get static data from a specific network by component
+    '''     Read the raw DataFrames from either a full or a lazy network
     ___________________________________________________________________'''
-    def get_all_static_data(self, network_filename, component):
-        network = self.get_network(network_filename)
-        if network:
-            component_data = getattr(network, network.components[component]['list_name'], None)
-            if isinstance(component_data, pd.DataFrame):
-                sanitized_data = component_data.replace([np.inf, -np.inf, np.nan], None)
-                return sanitized_data.reset_index()  # Convert index to a column
+    def read_static(self, network, component, columns=None):
+        list_name = network.components[component]['list_name']
+        if isinstance(network, LazyNetwork):
+            return network.read_static(list_name, columns)
+        component_data = getattr(network, list_name, None)
+        if isinstance(component_data, pd.DataFrame) and columns is not None:
+            component_data = component_data[[c for c in columns if c in component_data.columns]]
+        return component_data
+
+    def read_varying(self, network, component, attr, columns=None, window=None):
+        list_name = network.components[component]['list_name']
+        if isinstance(network, LazyNetwork):
+            return select_window(network.read_varying(list_name, attr, columns, window), window)
+        varying_data = getattr(network, f"{list_name}_t", None)
+        
+        # Case 1: varying_data is a DataFrame
+        if isinstance(varying_data, pd.DataFrame):
+            if attr in varying_data.columns:
+                return varying_data[[attr]]
+        
+        # Case 2: varying_data is a dictionary
+        elif isinstance(varying_data, dict) and attr in varying_data:
+            attribute_data = varying_data[attr]
+            if isinstance(attribute_data, pd.DataFrame) and columns is not None:
+                attribute_data = attribute_data[[c for c in columns if c in attribute_data.columns]]
+            return select_window(attribute_data, window)
         return None
 
+    '''     Get static data from a specific network by component
+    ___________________________________________________________________'''
+    def get_all_static_data(self, network_filename, component, columns=None, keys=None):
+        # Index as a column, inf/NaN masked as NaN (cached, do not modify), keys selects the component rows
+        return self.get_table(network_filename, component, None, columns, keys=keys)
+
 
     def get_varying_attributes(self, network_filename, component):
         """Retrieve varying attributes for a specific component in a specific network."""
         network = self.get_network(network_filename)
         if network and component in network.components:
+            if isinstance(network, LazyNetwork):
+                return network.varying.get(network.components[component]['list_name'], [])
             # Access the component's time-varying data
             component_data = getattr(network, f'{network.components[component]["list_name"]}_t', None)
             if isinstance(component_data, dict):
@@ -140,29 +1461,332 @@ class NetworkData:
 
     '''     Get the Time Series / Varying Data
     _______________________________________________'''
-    def get_varying_data(self, network_filename, component, attr):
-        """Retrieve time series data for a specific attribute of a component in a specific network."""
+    def get_varying_data(self, network_filename, component, attr, columns=None, aggregation=None, window=None):
+        """Retrieve time series data for a specific attribute of a component in a specific network (optionally aggregated).
+
+        The columns are the component keys (e.g. generator names), lazy networks only read those columns.
+        The window ([start, stop) snapshots) is selected before the aggregation, lazy networks only read its rows.
+        """
+        return self.get_table(network_filename, component, attr, columns, aggregation, window=window)
+
+    '''     Get the Raw Table (static data when attr is None, else varying data)
+    ___________________________________________________________________________'''
+    @metrics.timed
+    def get_table_frame(self, network_filename, component, attr=None, columns=None, aggregation=None, keys=None, window=None):
+        if attr is not None and aggregation:
+            return self.get_aggregated_frame(network_filename, component, attr, columns, aggregation, window)
         network = self.get_network(network_filename)
-        if network:
-            varying_data = getattr(network, f"{network.components[component]['list_name']}_t", None)
-            
-            # Case 1: varying_data is a DataFrame
-            if isinstance(varying_data, pd.DataFrame):
-                if attr in varying_data.columns:
-                    varying_attr_data = varying_data[[attr]].replace([np.inf, -np.inf, np.nan], None)
-                    varying_attr_data = varying_attr_data.reset_index()
-                    return varying_attr_data
-            
-            # Case 2: varying_data is a dictionary
-            elif isinstance(varying_data, dict) and attr in varying_data:
-                attribute_data = varying_data[attr]
-                if isinstance(attribute_data, pd.DataFrame):
-                    attribute_data = attribute_data.replace([np.inf, -np.inf, np.nan], None)
-                    attribute_data = attribute_data.reset_index()
-                    return attribute_data
-                return attribute_data
+        if not network:
+            return None
+        if attr is None:
+            frame = self.read_static(network, component, columns)
+            if isinstance(frame, pd.DataFrame) and keys is not None:
+                frame = frame[frame.index.isin(keys)]
+        else:
+            frame = self.read_varying(network, component, attr, columns, window)
+        if isinstance(network, LazyNetwork):
+            # The lazy network keeps the frame it read, so its size in the cache changed
+            self.networks.resize(network_filename)
+        return frame if isinstance(frame, pd.DataFrame) else None
+
+    '''     Get the Aggregated Time Series, cached per network, component, attribute and rule
+    ________________________________________________________________________________________'''
+    def get_aggregated_frame(self, network_filename, component, attr, columns, aggregation, window=None):
+        frame_key = ('aggregated', component, attr, tuple(columns) if columns is not None else None, aggregation, tuple(window or ()))
+        frame = self.networks.get_table(network_filename, frame_key)
+        if frame is None:
+            frame = self.get_table_frame(network_filename, component, attr, columns, window=window)
+            if frame is None:
+                return None
+            frame = aggregate_frame(frame, aggregation)
+            self.networks.set_table(network_filename, frame_key, frame)
+        return frame
+
+    '''     Get the Sanitized Table, cached until the network is reloaded
+    ______________________________________________________________________'''
+    def get_table(self, network_filename, component, attr=None, columns=None, aggregation=None, keys=None, window=None):
+        """Return the JSON-ready table (index as columns, inf masked) of the static or varying data."""
+        table_key = (
+            component, attr, tuple(columns) if columns is not None else None, aggregation,
+            tuple(keys) if keys is not None else None, tuple(window or ())
+        )
+        table = self.networks.get_table(network_filename, table_key)
+        metrics.increment('network_reader_table_cache_total', {'result': 'miss' if table is None else 'hit'},
+                          description="Sanitized table requests, served from the cache (hit) or built (miss).")
+        if table is None:
+            frame = self.get_table_frame(network_filename, component, attr, columns, aggregation, keys, window)
+            if frame is None:
+                return None
+            table = sanitize_table(frame)
+            self.networks.set_table(network_filename, table_key, table)
+        return table
+
+    '''     Get one Page of a Table, filtered and sorted on the server
+    ___________________________________________________________________'''
+    def get_table_page(self, network_filename, component, attr, page_current, page_size, sort_by=None, filter_query='', aggregation=None, keys=None, window=None):
+        """Return (records, page_count) where only the visible page is serialized."""
+        if attr is None:
+            table = self.get_all_static_data(network_filename, component, keys=keys)
+        else:
+            table = self.get_varying_data(network_filename, component, attr, keys, aggregation, window)
+        return table_page(table, page_current, page_size, sort_by, filter_query)
+
+    '''     Get the Differences between the Static Data of Several Networks
+    ________________________________________________________________________'''
+    def get_static_diff(self, network_filenames, component, columns=None):
+        """Return the JSON-ready diff of the networks against the first one, cached with the first network."""
+        # The other networks' file signatures are part of the key, so reloading any of them builds a new diff
+        diff_key = (
+            'diff', component, tuple(columns) if columns is not None else None,
+            tuple((network_filename, self.signatures.get(network_filename)) for network_filename in network_filenames[1:])
+        )
+        table = self.networks.get_table(network_filenames[0], diff_key)
+        if table is None:
+            frames = {}
+            for network_filename in network_filenames:
+                frame = self.get_table_frame(network_filename, component, columns=columns)
+                if frame is None:
+                    return None
+                frames[network_filename] = frame
+            table = sanitize_table(diff_static_frames(frames))
+            self.networks.set_table(network_filenames[0], diff_key, table)
+        return table
+
+    def get_diff_page(self, network_filenames, component, page_current, page_size, sort_by=None, filter_query=''):
+        table = self.get_static_diff(network_filenames, component)
+        return table_page(table, page_current, page_size, sort_by, filter_query)
+
+    '''     Get the Summary Statistics of a Varying Attribute across Networks
+    __________________________________________________________________________'''
+    def get_statistics(self, network_filename, component, attr, aggregation=None, window=None):
+        """Statistics of every column of the (optionally aggregated) time series, cached with the network."""
+        statistics_key = ('statistics', component, attr, aggregation, tuple(window or ()))
+        statistics = self.networks.get_table(network_filename, statistics_key)
+        if statistics is None:
+            frame = self.get_table_frame(network_filename, component, attr, aggregation=aggregation, window=window)
+            if frame is None:
+                return None
+            statistics = summarize_frame(frame)
+            self.networks.set_table(network_filename, statistics_key, statistics)
+        return statistics
+
+    def get_statistics_table(self, network_filenames, component, attr, aggregation=None, keys=None, window=None):
+        """Return the JSON-ready statistics of the networks side by side, only the selected keys if given."""
+        statistics = {}
+        for network_filename in network_filenames:
+            networkStatistics = self.get_statistics(network_filename, component, attr, aggregation, window)
+            if networkStatistics is not None:
+                statistics[network_filename] = networkStatistics if keys is None else networkStatistics[networkStatistics.index.isin(keys)]
+        if not statistics:
+            return None
+        return sanitize_table(combine_statistics(statistics))
+
+    def get_statistics_page(self, network_filenames, component, attr, page_current, page_size, sort_by=None, filter_query='', aggregation=None, keys=None, window=None):
+        table = self.get_statistics_table(network_filenames, component, attr, aggregation, keys, window)
+        return table_page(table, page_current, page_size, sort_by, filter_query)
+
+    '''     Get the Full Frame behind a Table shown in the UI (for downloads)
+    ___________________________________________________________________________'''
+    def get_source_frame(self, tableSource):
+        """Return the frame described by a table source, loading its networks if they were evicted."""
+        networks = tableSource.get('networks') or [tableSource['network']]
+        dict(self.load_networks(tableSource['folder'], networks))
+        if tableSource.get('view') == 'statistics':
+            return self.get_statistics_table(
+                networks, tableSource['component'], tableSource['attribute'], tableSource['aggregation'], tableSource['keys'], tableSource.get('window')
+            )
+        if 'networks' in tableSource:
+            return self.get_static_diff(networks, tableSource['component'])
+        if tableSource['attribute'] is None:
+            return self.get_table_frame(tableSource['network'], tableSource['component'], keys=tableSource.get('keys'))
+        return self.get_table_frame(
+            tableSource['network'], tableSource['component'], tableSource['attribute'],
+            tableSource.get('keys'), tableSource.get('aggregation'), window=tableSource.get('window')
+        )
+
+
 
+
+
+'''     Background Prefetch of the Networks in a Folder
+_____________________________________________________________'''
+class NetworkPrefetcher:
+    """Loads the networks of a folder in background threads while the user is still choosing, ticked files go first."""
+    def __init__(self, network_data, workers=2, enabled=False):
+        self.network_data = network_data
+        self.workers = workers
+        self.enabled = enabled
+        self.lock = th.Lock()
+        self.folder = None
+        self.queue = []
+        self.status = {}
+        self.running = 0
+
+    def start(self, network_folder, network_filenames):
+        """Queue every network of a newly selected folder (replaces the previous folder's queue)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.folder = network_folder
+            self.queue = list(network_filenames)
+            self.status = {network_filename: 'queued' for network_filename in network_filenames}
+            # Under a memory budget one network is loaded at a time, so the budget is checked again before the next one
+            workers = self.workers if self.network_data.networks.budget is None else 1
+            while self.running < workers:
+                self.running += 1
+                th.Thread(target=self.run, daemon=True).start()
+
+    def prioritise(self, network_filenames):
+        """Move the ticked networks to the front of the queue, in the order they were ticked."""
+        with self.lock:
+            ticked = [net for net in network_filenames or [] if net in self.queue]
+            self.queue = ticked + [net for net in self.queue if net not in ticked]
+
+    def has_room(self):
+        networks = self.network_data.networks
+        return networks.budget is None or networks.memory() < networks.budget
+
+    def stop(self):
+        """Mark what is left in the queue as not prefetched, called with the lock held."""
+        for network_filename in self.queue:
+            self.status[network_filename] = 'memory full'
+        self.queue = []
+        self.running -= 1
+
+    def run(self):
+        networks = self.network_data.networks
+        while True:
+            with self.lock:
+                if not self.queue or not self.has_room():
+                    # Stop when done, or when warming more networks would only evict others
+                    self.stop()
+                    return
+                network_filename = self.queue.pop(0)
+                network_folder, status = self.folder, self.status
+                status[network_filename] = 'loading'
+                # The networks already loaded are never evicted to make room for a prefetched one
+                networks.pin(set(networks.keys()) - {network_filename}, view='prefetch')
+            self.network_data.prefetch_network(network_folder, network_filename)
+            with self.lock:
+                loaded = network_filename in networks
+                over_budget = networks.budget is not None and networks.memory() > networks.budget
+                if over_budget and network_filename not in networks.pinned:
+                    # The network did not fit, drop it again rather than keep the cache over its budget
+                    networks.pop(network_filename)
+                networks.pin([], view='prefetch')
+                if network_filename in networks:
+                    status[network_filename] = 'loaded'
+                else:
+                    status[network_filename] = 'memory full' if loaded else 'failed'
+                if over_budget:
+                    self.stop()
+                    return
+
+    def is_active(self):
+        with self.lock:
+            return self.running > 0
+
+    def labels(self, network_filenames):
+        """Checklist options with the prefetch status of each network in its label."""
+        networks = self.network_data.networks
+        with self.lock:
+            options = []
+            for net in network_filenames:
+                # Loaded means in the cache now, a prefetched network may have been evicted since
+                status = 'loaded' if net in networks else self.status.get(net)
+                if status == 'loaded' and net not in networks:
+                    status = None
+                options.append({'label': f"{net} ({status})" if status else net, 'value': net})
+            return options
+
+
+
+
+'''     Local Job Manager that Runs Slow Loads and Plots outside of the Dash Callbacks
+________________________________________________________________________________________'''
+class Job:
+    def __init__(self, key, networks):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.networks = list(networks)
+        self.progress = {network: 'queued' for network in networks}
+        self.status = 'running'
+        self.result = None
+        self.error = None
+        self.cancelled = th.Event()
+        self.finished = th.Event()
+
+
+class JobManager:
+    """Runs jobs in a thread pool and keeps them in memory until their result is collected."""
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = {}
+        self.lock = th.Lock()
+        self.synchronous = False    # Set when served by several processes, jobs only live in the worker that started them
+
+    def submit(self, key, networks, func, *args):
+        """Start func(job, *args), or return the running job with the same key instead of starting it twice."""
+        with self.lock:
+            for job in self.jobs.values():
+                if job.key == key and job.status == 'running' and not job.cancelled.is_set():
+                    return job
+            job = Job(key, networks)
+            self.jobs[job.id] = job
+        self.pool.submit(self.run, job, func, args)
+        return job
+
+    def run(self, job, func, args):
+        try:
+            job.result = func(job, *args)
+            job.status = 'cancelled' if job.cancelled.is_set() else 'done'
+        except Exception as e:
+            print(f"An error occurred while running the job: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished.set()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.pop(job_id, None)
+        if job is not None:
+            job.cancelled.set()
+
+    def forget(self, job_id):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+
+def load_networks_job(job, network_folder, network_filenames):
+    """Job that loads the selected networks, recording the progress of each one."""
+    for network_filename in network_filenames:
+        job.progress[network_filename] = 'loading'
+    networks = network_data.load_networks(network_folder, network_filenames)
+    for network_filename, network in networks:
+        job.progress[network_filename] = 'loaded' if network is not None else 'failed'
+        if job.cancelled.is_set():
+            # Closing the generator cancels the imports that have not started
+            networks.close()
+            break
+
+
+def plot_networks_job(job, plotSource):
+    """Job that loads the networks to plot and builds the comparison figure."""
+    load_networks_job(job, network_folder_path(plotSource['folder']), plotSource['networks'])
+    if job.cancelled.is_set():
         return None
+    fig = go.Figure()
+    emptyNetworks = plot_networks(fig, plotSource)
+    return fig, emptyNetworks
+
+
+def job_progress(job, title):
+    return f"{title}: " + ", ".join(f"{network} ({status})" for network, status in job.progress.items())
 
 
 
@@ -277,8 +1901,15 @@ visiblePlot = {'display': 'block', 'width': '100%', 'height': '100%', 'margin-to
 '''     This is the HTML format for the Dash Webpage
 _________________________________________________________'''
 app.layout = html.Div([
+    dcc.Location(id='page-url'),
     dcc.Store(id='hiddenNetworkWindow', data={'is_hidden': True}),
     dcc.Store(id='hiddenPlotWindow', data={'is_hidden': True}),
+    dcc.Store(id='table-source', data=None),
+    dcc.Store(id='plot-source', data=None),
+    dcc.Interval(id='prefetch-interval', interval=1000, disabled=True),
+    dcc.Store(id='load-job', data=None),
+    dcc.Store(id='plot-job', data=None),
+    dcc.Interval(id='job-interval', interval=500, disabled=True),
     html.Div([
         html.Div([                      # Network Selection
             html.Div(
@@ -289,7 +1920,7 @@ app.layout = html.Div([
                     ),
                     dcc.Dropdown(
                         id='folder-dropdown',
-                        options=[{'label': folder.name, 'value': folder.name} for folder in ROOT_DIRECTORY.iterdir() if folder.is_dir()],
+                        options=[],
                         placeholder="Select a folder...",
                         style=visibleDropdown
                     )
@@ -366,6 +1997,37 @@ app.layout = html.Div([
                     )
                 ],
                 style=TinyBoxStyle
+            ),
+            html.Div(
+                [
+                    html.Label(
+                        "Aggregate:", 
+                        id='aggregation-label', 
+                        style=hiddenLabel
+                    ),
+                    dcc.Dropdown(
+                        id='aggregation-dropdown', 
+                        options=aggregation_options(),
+                        placeholder="No aggregation", 
+                        style=hiddenDropdown
+                    )
+                ],
+                style=TinyBoxStyle
+            ),
+            html.Div(
+                [
+                    html.Label(
+                        "Snapshot Window:", 
+                        id='window-label', 
+                        style=hiddenLabel
+                    ),
+                    dcc.DatePickerRange(
+                        id='snapshot-window',
+                        clearable=True,
+                        style=hiddenDropdown
+                    )
+                ],
+                style=TinyBoxStyle
             )
             
         ], 
@@ -389,6 +2051,14 @@ app.layout = html.Div([
                             {
                                 'label': 'Varying Data', 
                                 'value': 'varying'
+                            },
+                            {
+                                'label': 'Static Differences', 
+                                'value': 'diff'
+                            },
+                            {
+                                'label': 'Varying Statistics', 
+                                'value': 'statistics'
                             }
                         ],
                         value='static',
@@ -458,6 +2128,16 @@ app.layout = html.Div([
                                 options=[], 
                                 style={**visibleDropdown, 'maxHeight': '150px', 'overflowY': 'auto'}
                             ),
+                            dcc.RadioItems(
+                                id='plotmode-radio',
+                                options=[
+                                    {'label': 'Lines', 'value': 'lines'},
+                                    {'label': 'Heatmaps', 'value': 'heatmap'},
+                                    {'label': 'Heatmap Differences', 'value': 'difference'}
+                                ],
+                                value='lines',
+                                style=visibleDropdown
+                            ),
                             html.Button(
                                 "Done",
                                 id="plot-done",
@@ -483,6 +2163,16 @@ app.layout = html.Div([
     style=BigBoxStyle
     ),
 
+    html.Div(
+        id='job-status',
+        style={'margin-top': '10px', 'fontFamily': 'Roboto, sans-serif'}
+    ),
+
+    html.Div(
+        id='download-links',
+        style={'margin-top': '10px', 'fontFamily': 'Roboto, sans-serif'}
+    ),
+
     dcc.Loading(
         id="loading-output",
         type="default",
@@ -529,27 +2219,78 @@ The Following are Callbacks that Dash Uses to Dynamically Change the Webpage bas
 ______________________________________________________________________________________________________________________'''
 
 network_data = NetworkData()
+network_prefetcher = NetworkPrefetcher(network_data)
+job_manager = JobManager()
 
 
 
 '''     Adds a list of Networks based on the Selected Folder
 _________________________________________________________________'''
+@app.callback(
+    [
+        Output('folder-dropdown', 'options'),
+        Output('folder-dropdown', 'value')
+    ],
+    [
+        Input('page-url', 'pathname')
+    ],
+    [
+        State('folder-dropdown', 'value')
+    ]
+)
+def list_folders(pathname, selected_folder):
+    """List the folders when the page loads (not at import), so new folders show up without a reload."""
+    folders = [folder.name for folder in ROOT_DIRECTORY.iterdir() if folder.is_dir()]
+    if selected_folder is None and Default_Folder and Default_Folder.name in folders:
+        selected_folder = Default_Folder.name
+    return [{'label': folder, 'value': folder} for folder in folders], selected_folder
+
+
 @app.callback(
     [
         Output('network-dropdown', 'options'),
-        Output('plotselect-dropdown', 'options')
+        Output('plotselect-dropdown', 'options'),
+        Output('prefetch-interval', 'disabled')
     ],
     [
         Input('folder-dropdown', 'value')
-    ]    
+    ]
 )
 def update_network_dropdown(selected_folder):
     if selected_folder is None:
-        return [], []
-    network_folder = ROOT_DIRECTORY / selected_folder
-    network_files = [f.name for f in network_folder.iterdir() if f.suffix == '.h5']
+        return [], [], True
+    network_folder = network_folder_path(selected_folder)
+    # Listing the folder also brings its metadata index up to date
+    network_files = network_data.get_index(network_folder, update=False).update()
     dropdown_options = [{'label': net, 'value': net} for net in network_files]
-    return dropdown_options, dropdown_options
+
+    # Start warming the folder's networks while the user picks which ones to open
+    network_prefetcher.start(network_folder, network_files)
+    return network_prefetcher.labels(network_files), dropdown_options, not network_prefetcher.enabled
+
+
+'''     Shows the Prefetch Status in the Network Checklist, Ticked Networks are Loaded First
+____________________________________________________________________________________________'''
+@app.callback(
+    [
+        Output('network-dropdown', 'options', allow_duplicate=True),
+        Output('prefetch-interval', 'disabled', allow_duplicate=True)
+    ],
+    [
+        Input('prefetch-interval', 'n_intervals'),
+        Input('network-dropdown', 'value')
+    ],
+    [
+        State('network-dropdown', 'options')
+    ],
+    prevent_initial_call=True
+)
+def update_prefetch_status(intervals, tickedNetworks, networkOptions):
+    if not network_prefetcher.enabled or not networkOptions:
+        return dash.no_update, True
+    network_prefetcher.prioritise(tickedNetworks)
+    network_files = [option['value'] for option in networkOptions]
+    return network_prefetcher.labels(network_files), not network_prefetcher.is_active()
 
 
 '''     Ensures Dropdowns are Hidden when a New Folder is Selected
@@ -577,7 +2318,8 @@ ________________________________________________________________________________
         Output('datatype-label', 'style'),        
         Output('tableselect-dropdown', 'style'),
         Output('tableselect-label', 'style'),
-        Output('network-done', 'n_clicks')
+        Output('network-done', 'n_clicks'),
+        Output('load-job', 'data')
     ],
     [
         Input('network-done', 'n_clicks')
@@ -590,31 +2332,38 @@ ________________________________________________________________________________
 def load_selected_network(doneClick, network_filenames, network_foldername):
     if doneClick and network_filenames:
         commonComponents = None
-        finalNetworkList = []
         
+        network_data.networks.pin(network_filenames)
+        finalNetworkList = []
+
+        # The components come from the folder's metadata index, networks are only loaded for tables and plots
+        networkFolder = network_folder_path(network_foldername)
+        networkIndex = network_data.get_index(networkFolder)
         for selectedNetwork in network_filenames:
-            if selectedNetwork not in network_data.networks:
-                network_data.load_network(network_foldername, selectedNetwork)
-            eachNetwork = network_data.get_network(selectedNetwork)
-            if eachNetwork:
-                currentComponents = set(eachNetwork.components.keys())
+            currentComponents = networkIndex.get_components(selectedNetwork)
+            if currentComponents is not None:
                 if commonComponents is None:
-                    commonComponents = currentComponents
+                    commonComponents = set(currentComponents)
                 else:
                     commonComponents = commonComponents.intersection(currentComponents)
                 finalNetworkList.append({'label': selectedNetwork, 'value': selectedNetwork})
-                if not commonComponents:
-                    break
 
         finalComponentList = [{'label': comp, 'value': comp} for comp in commonComponents] if commonComponents else []
 
+        # Load the networks in the background so their tables are ready, the page stays usable meanwhile
+        loadJob = job_manager.submit(
+            ('load', str(networkFolder), tuple(network_filenames)), network_filenames,
+            load_networks_job, networkFolder, network_filenames
+        )
+
         return (            
             finalComponentList,
             finalNetworkList,
             visibleDropdown, visibleLabel, 
             visibleDropdown, visibleLabel,
             visibleDropdown, visibleLabel,
-            0
+            0,
+            loadJob.id
         )
 
     return (
@@ -622,7 +2371,8 @@ def load_selected_network(doneClick, network_filenames, network_foldername):
         hiddenDropdown, hiddenLabel,
         hiddenDropdown, hiddenLabel,
         hiddenDropdown, hiddenLabel,
-        0
+        0,
+        dash.no_update
     )
 
 
@@ -633,18 +2383,236 @@ def load_selected_network(doneClick, network_filenames, network_foldername):
 '''     This Callback Sets the Table and Plot for both Static and Varying Data
 ___________________________________________________________________________________'''
 
-def create_plot(data, x_axis_data, y_columns, title_suffix=""):
-    fig = go.Figure()
-    for column in y_columns:
-        fig.add_trace(go.Scatter(
-            x=x_axis_data,
-            y=data[column],
-            mode='lines',
-            name=f"{column} {title_suffix}"
-        ))
+def create_table(columns):
+    # Only the current page is sent to the browser (see update_table_page)
+    return dash_table.DataTable(
+        id='component-table',
+        columns=[{"name": i, "id": i} for i in columns],
+        data=[],
+        page_current=0,
+        page_size=10,
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='multi',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left'},
+        style_header={'backgroundColor': 'lightgrey', 'fontWeight': 'bold'}
+    )
+
+
+def minmax_downsample(values, max_points=MaxPlotPoints):
+    """Return the row positions (rows x columns) to plot, keeping the min and max of each bucket so peaks are preserved."""
+    rows, columns = values.shape
+    if rows <= max_points:
+        return np.broadcast_to(np.arange(rows)[:, None], (rows, columns))
+    size = -(-rows // (max_points // 2))
+    buckets = -(-rows // size)
+
+    # Split the rows into equal buckets (the last one padded) and find the min/max of every column at once
+    blocks = np.full((buckets * size, columns), np.nan)
+    blocks[:rows] = values
+    blocks = blocks.reshape(buckets, size, columns)
+    missing = np.isnan(blocks)
+    high = np.where(missing, -np.inf, blocks).argmax(axis=1)
+    low = np.where(missing, np.inf, blocks).argmin(axis=1)
+
+    # Keep the min and max in the order they happen so the line is drawn correctly
+    start = (np.arange(buckets) * size)[:, None, None]
+    positions = np.stack([np.minimum(low, high), np.maximum(low, high)], axis=1) + start
+    return np.minimum(positions.reshape(buckets * 2, columns), rows - 1)
+
+
+def plot_dates(x_axis_data):
+    """Dates as float milliseconds since the epoch (NaT as NaN), which a date axis reads and a typed array can hold."""
+    dates = pd.DatetimeIndex(x_axis_data)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return ((dates - pd.Timestamp(0)) / pd.Timedelta(milliseconds=1)).to_numpy(dtype=float)
+
+
+def trace_array(values):
+    """Plotly sends numeric NumPy arrays as typed arrays, lists keep the plain JSON numbers for older clients."""
+    return values.tolist() if not BinaryPlotArrays and values.dtype.kind in 'iuf' else values
+
+
+def create_plot(data, x_axis_data, y_columns, title_suffix="", fig=None, max_points=MaxPlotPoints, webgl=None):
+    fig = fig if fig is not None else go.Figure()
+    values = data[y_columns].to_numpy(dtype=float)
+    dates = BinaryPlotArrays and pd.api.types.is_datetime64_any_dtype(x_axis_data)
+    # NumPy arrays are sent as base64 typed arrays, dates would otherwise be sent as ISO strings
+    x_values = plot_dates(x_axis_data) if dates else np.asarray(x_axis_data)
+
+    # All traces are cut from the DataFrame's NumPy block in one pass
+    if len(values) > max_points:
+        positions = minmax_downsample(values, max_points)
+        x_traces = x_values[positions].T
+        y_traces = np.take_along_axis(values, positions, axis=0).T
+    else:
+        x_traces = [x_values] * len(y_columns)
+        y_traces = values.T
+
+    if webgl is None:
+        webgl = len(fig.data) + len(y_columns) > WebGLTraceThreshold
+    fig.add_traces([
+        {
+            'type': 'scattergl' if webgl else 'scatter',
+            'x': trace_array(x_traces[i]),
+            'y': trace_array(y_traces[i]),
+            'mode': 'lines',
+            'name': f"{column} {title_suffix}"
+        }
+        for i, column in enumerate(y_columns)
+    ])
+    if dates:
+        fig.update_xaxes(type='date')
+    return fig
+
+
+def plot_range(x_axis_data, x_range):
+    """Boolean mask of the snapshots inside the zoomed x range."""
+    if pd.api.types.is_datetime64_any_dtype(x_axis_data):
+        start, end = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    else:
+        start, end = float(x_range[0]), float(x_range[1])
+    return (x_axis_data >= start) & (x_axis_data <= end)
+
+
+def bin_axis(values, bins, axis):
+    """Mean of equal runs of rows (axis 0) or columns (axis 1), returns the binned values and the position each bin starts at."""
+    size = values.shape[axis]
+    if size <= bins:
+        return values, np.arange(size)
+    starts = np.arange(bins) * size // bins
+    missing = np.isnan(values)
+    sums = np.add.reduceat(np.where(missing, 0.0, values), starts, axis=axis)
+    counts = np.add.reduceat(~missing, starts, axis=axis, dtype=np.int32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, starts
+
+
+def heatmap_labels(names, starts):
+    """Label every binned component, the first and last name of the bin when several are averaged."""
+    ends = np.append(starts[1:], len(names)) - 1
+    return [names[start] if start == end else f"{names[start]} to {names[end]}" for start, end in zip(starts, ends)]
+
+
+def create_heatmap(data, x_axis_data, fig, row=1, col=1, snapshot_bins=HeatmapSnapshotBins, component_bins=HeatmapComponentBins):
+    # Snapshots are binned first, which shrinks the array before the components are
+    values, rowStarts = bin_axis(data.to_numpy(dtype=float), snapshot_bins, 0)
+    values, columnStarts = bin_axis(values, component_bins, 1)
+    dates = BinaryPlotArrays and pd.api.types.is_datetime64_any_dtype(x_axis_data)
+    x_values = plot_dates(x_axis_data) if dates else np.asarray(x_axis_data)
+
+    # One trace holds the whole (components x snapshots) array
+    fig.add_trace({
+        'type': 'heatmap',
+        'z': trace_array(np.ascontiguousarray(values.T)),
+        'x': trace_array(x_values[rowStarts]),
+        'y': heatmap_labels([str(column) for column in data.columns], columnStarts),
+        'coloraxis': 'coloraxis'
+    }, row=row, col=col)
+    if dates:
+        fig.update_xaxes(type='date', row=row, col=col)
+    return fig
+
+
+def same_snapshot_kind(index, other):
+    """Whether two snapshot indexes can be aligned, both single or multi-period and both dates or not."""
+    dates = [pd.api.types.is_datetime64_any_dtype(i.get_level_values(-1)) for i in (index, other)]
+    return index.nlevels == other.nlevels and dates[0] == dates[1]
+
+
+def plot_heatmaps(fig, plotData, difference=False):
+    """Add a heatmap of every network side by side, or of each network minus the first one."""
+    networks = list(plotData)
+    # A single network has nothing to be compared with and is shown on its own
+    difference = difference and len(networks) > 1
+    if difference:
+        base = plotData[networks[0]]
+        for network in networks[1:]:
+            if not same_snapshot_kind(base.index, plotData[network].index):
+                raise ValueError(
+                    f"Heatmap differences need networks with the same kind of snapshots, '{network}' and '{networks[0]}' differ "
+                    "(single or multi-period, dates or not). Plot them as side-by-side heatmaps instead."
+                )
+        # The other networks are aligned with the first one, missing snapshots or components are left blank
+        panels = {
+            f"{network} - {networks[0]}": plotData[network].reindex(index=base.index, columns=base.columns) - base
+            for network in networks[1:]
+        }
+    else:
+        panels = plotData
+    if not panels:
+        return fig
+
+    fig.set_subplots(rows=1, cols=len(panels), shared_yaxes=True, subplot_titles=list(panels))
+    for col, data in enumerate(panels.values(), start=1):
+        create_heatmap(data, data.index.get_level_values(-1), fig, col=col, snapshot_bins=max(1, HeatmapSnapshotBins // len(panels)))
+    # All heatmaps share one colour scale and zoom together
+    fig.update_layout(coloraxis={'colorscale': 'RdBu', 'cmid': 0} if difference else {'colorscale': 'Viridis'})
+    fig.update_xaxes(matches='x')
     return fig
 
 
+def plot_networks(fig, plotSource, x_range=None):
+    """Add the downsampled traces of every network to the figure, returns the networks with no data."""
+    emptyNetworks = []
+    networkNames = ""
+    plotData = {}
+    # Networks that are not cached yet are loaded in parallel
+    network_data.networks.pin(plotSource['networks'], 'plot')
+    dict(network_data.load_networks(network_folder_path(plotSource['folder']), plotSource['networks']))
+    for network in plotSource['networks']:
+        varyingComponentData = network_data.get_table_frame(
+            network, plotSource['component'], plotSource['attribute'], plotSource.get('keys'), plotSource.get('aggregation'),
+            window=plotSource.get('window')
+        )
+        if networkNames:
+            networkNames += f", '{network}'"
+        else:
+            networkNames += f"'{network}'"
+
+        if varyingComponentData is not None:
+            plotData[network] = varyingComponentData
+        else:
+            emptyNetworks.append(network)
+
+    aggregation = f" ({plotSource['aggregation']})" if plotSource.get('aggregation') else ""
+    # Multi-period snapshots are plotted against their timestep
+    if x_range:
+        plotData = {
+            network: data[plot_range(data.index.get_level_values(-1), x_range)]
+            for network, data in plotData.items()
+        }
+    mode = plotSource.get('mode') or 'lines'
+    if mode == 'lines':
+        # Switch every trace to WebGL once the whole comparison has too many traces for SVG
+        webgl = sum(len(data.columns) for data in plotData.values()) > WebGLTraceThreshold
+        for network, varyingComponentData in plotData.items():
+            create_plot(varyingComponentData, varyingComponentData.index.get_level_values(-1), varyingComponentData.columns, f"({network})", fig, webgl=webgl)
+    else:
+        plot_heatmaps(fig, plotData, difference=mode == 'difference')
+    modeName = {'heatmap': " as Heatmaps", 'difference': " as Heatmap Differences"}.get(mode, "")
+    fig.update_layout(
+        title={"text": f"Comparing Attribute: ['{plotSource['attribute']}'{aggregation}] for Network/s: [{networkNames}]{modeName}"},
+        uirevision=str(plotSource)
+    )
+    if x_range:
+        fig.update_xaxes(range=list(x_range))
+    return emptyNetworks
+
+
+def picker_window(startDate, endDate):
+    """The snapshot window [start, stop) of the picked dates (the whole end date is included), None if none are picked."""
+    if not startDate and not endDate:
+        return None
+    stop = (pd.Timestamp(endDate).normalize() + pd.Timedelta(days=1)).isoformat() if endDate else None
+    return [pd.Timestamp(startDate).isoformat() if startDate else None, stop]
+
+
 @app.callback(
     [
         Output('data-output', 'children'),
@@ -658,14 +2626,22 @@ def create_plot(data, x_axis_data, y_columns, title_suffix=""):
         Output('attribute-dropdown', 'style'), 
         Output('attribute-label', 'style'),       
         Output('plot-window-toggle', 'style'),
-        Output('plotselect-label', 'style')
+        Output('plotselect-label', 'style'),
+        Output('table-source', 'data'),
+        Output('plot-source', 'data'),
+        Output('plot-job', 'data')
     ],
     [       
         Input('component-dropdown', 'value'), 
         Input('datatype-dropdown', 'value'), 
         Input('attribute-dropdown', 'value'),
         Input('tableselect-dropdown', 'value'),
-        Input('plot-done', 'n_clicks')
+        Input('plot-done', 'n_clicks'),
+        Input('aggregation-dropdown', 'value'),
+        Input('keyselect-dropdown', 'value'),
+        Input('plotmode-radio', 'value'),
+        Input('snapshot-window', 'start_date'),
+        Input('snapshot-window', 'end_date')
     ],
     [
         State('attribute-dropdown', 'options'),
@@ -683,7 +2659,8 @@ def create_plot(data, x_axis_data, y_columns, title_suffix=""):
 )
 def display_data(
         selectedComponent, dataType, selectedAttribute, 
-        tabulateNetwork, doneClick, 
+        tabulateNetwork, doneClick, aggregation, selectedKeys, plotMode,
+        windowStart, windowEnd,
         currentAttribute, selectedFolder,
         currentTableNetwork, currentPlotNetwork,
         tableVis, plotVis,
@@ -704,8 +2681,13 @@ def display_data(
     if currentPlotNetwork:
         for plots in currentPlotNetwork:
             plotValue.append(plots)
-    networkNames = ""
     commonAttributes = None
+    tableSource = None
+    plotSource = None
+    plotJob = dash.no_update
+    # No selected keys means every component key is shown
+    selectedKeys = selectedKeys or None
+    window = picker_window(windowStart, windowEnd)
     
     # Maintain current visibility settings
     showOutput = tableVis
@@ -714,37 +2696,76 @@ def display_data(
     showAttrLabel = attrLabelVis
     showPlotWindowBtn = plotWindowVisBtn
     showPlotLabel = plotLabelVis
-    if dataType == "varying":
+    if dataType in ("varying", "statistics"):
         showAttrDropdown = visibleDropdown
         showAttrLabel = visibleLabel
 
+    # Networks selected in the UI are never evicted from the cache
+    network_data.networks.pin(set(allNetworks or []) | set(plotValue))
+    network_data.networks.pin([tabulateNetwork], 'table')
+
     if selectedComponent and selectedFolder:
-        if dataType == "varying":
+        # The table and plot sources keep the folder's name, the networks are read from its path under ROOT_DIRECTORY
+        networkFolder = network_folder_path(selectedFolder)
+        if dataType in ("varying", "statistics"):
+            networkIndex = network_data.get_index(networkFolder, update=False)
             for allNets in allNetworks:
-                
-                eachNetwork = network_data.get_network(allNets)
-                if eachNetwork:
-                    # Get varying attributes for the selected component in the current network
-                    currentAttributes = network_data.get_varying_attributes(allNets, selectedComponent)
-                    
-                    if currentAttributes is not None:
-                        if commonAttributes is None:
-                            # Initialize commonAttributes with the first network's attributes
-                            commonAttributes = set(currentAttributes)
-                        else:
-                            # Take the intersection of attributes
-                            commonAttributes = commonAttributes.intersection(currentAttributes)
+                # Get varying attributes for the selected component in the current network (from the index)
+                currentAttributes = networkIndex.get_varying_attributes(allNets, selectedComponent)
+                if currentAttributes is not None:
+                    if commonAttributes is None:
+                        # Initialize commonAttributes with the first network's attributes
+                        commonAttributes = set(currentAttributes)
+                    else:
+                        # Take the intersection of attributes
+                        commonAttributes = commonAttributes.intersection(currentAttributes)
 
             # Convert common attributes to dropdown options
             attributeOptions = [{'label': attr, 'value': attr} for attr in commonAttributes] if commonAttributes else []
 
-        if tabulateNetwork and not button_id == "plot-done":
-            network_data.load_network(selectedFolder, tabulateNetwork)
-            current_network = network_data.get_network(tabulateNetwork)
+        if dataType == "diff":
+            # The selected networks are compared with the first one, no single network is tabulated
+            showAttrDropdown = hiddenDropdown
+            showAttrLabel = hiddenLabel
+            showOutput = visible
+            showPlot = hiddenPlot
+            if len(allNetworks or []) < 2:
+                output_content = html.Div("Select two or more networks to compare their static data.")
+            else:
+                dict(network_data.load_networks(networkFolder, allNetworks))
+                staticDiff = network_data.get_static_diff(allNetworks, selectedComponent)
+                if staticDiff is not None:
+                    tableSource = {'folder': selectedFolder, 'networks': allNetworks, 'component': selectedComponent}
+                    output_content = html.Div([
+                        html.Div(f"{len(staticDiff)} {selectedComponent} rows differ from '{allNetworks[0]}'."),
+                        create_table(list(staticDiff.columns))
+                    ])
+                else:
+                    output_content = html.Div(f"No static data available to compare for {selectedComponent}.")
+
+        elif dataType == "statistics":
+            # Statistics of the attribute for every selected network, the series are never sent to the browser
+            showOutput = visible
+            showPlot = hiddenPlot
+            output_content = html.Div("Select an attribute to view its statistics.")
+            if selectedAttribute:
+                dict(network_data.load_networks(networkFolder, allNetworks))
+                statistics = network_data.get_statistics_table(allNetworks, selectedComponent, selectedAttribute, aggregation, selectedKeys, window)
+                if statistics is not None:
+                    tableSource = {
+                        'view': 'statistics', 'folder': selectedFolder, 'networks': allNetworks, 'component': selectedComponent,
+                        'attribute': selectedAttribute, 'aggregation': aggregation, 'keys': selectedKeys, 'window': window
+                    }
+                    output_content = create_table(list(statistics.columns))
+                else:
+                    output_content = html.Div(f"No varying data available for {selectedComponent} / {selectedAttribute}.")
+
+        elif tabulateNetwork and not button_id == "plot-done":
+            current_network = network_data.ensure_network(networkFolder, tabulateNetwork)
             
             if current_network is None:
                 output_content = html.Div("No data available for the selected network.")
-                return output_content, fig, attributeOptions, tableValue, plotValue, 0, showOutput, showPlot, showAttrDropdown, showAttrLabel, showPlotWindowBtn, showPlotLabel
+                return output_content, fig, attributeOptions, tableValue, plotValue, 0, showOutput, showPlot, showAttrDropdown, showAttrLabel, showPlotWindowBtn, showPlotLabel, tableSource, plotSource, plotJob
             
             tableValue = tabulateNetwork
             showOutput = visible
@@ -753,16 +2774,13 @@ def display_data(
             if dataType == "static":
                 showAttrDropdown = hiddenDropdown
                 showAttrLabel = hiddenLabel
-                staticComponentData = network_data.get_all_static_data(tabulateNetwork, selectedComponent)
+                staticComponentData = network_data.get_table_frame(tabulateNetwork, selectedComponent, keys=selectedKeys)
                 if staticComponentData is not None:
-                    output_content = dash_table.DataTable(
-                        data=staticComponentData.to_dict('records'),
-                        columns=[{"name": i, "id": i} for i in staticComponentData.columns],
-                        page_size=10,
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={'backgroundColor': 'lightgrey', 'fontWeight': 'bold'}
-                    )
+                    tableSource = {
+                        'folder': selectedFolder, 'network': tabulateNetwork, 'component': selectedComponent,
+                        'attribute': None, 'keys': selectedKeys
+                    }
+                    output_content = create_table(table_columns(staticComponentData))
                 else:
                     output_content = html.Div(f"No static data available for {tabulateNetwork} / {selectedComponent}.")
             
@@ -772,53 +2790,321 @@ def display_data(
                 output_content = html.Div("Select an attribute to view varying data.")
                 
                 if selectedAttribute:                    
-                    varyingComponentData = network_data.get_varying_data(tabulateNetwork, selectedComponent, selectedAttribute)
+                    varyingComponentData = network_data.get_table_frame(
+                        tabulateNetwork, selectedComponent, selectedAttribute, selectedKeys, aggregation, window=window
+                    )
                     if varyingComponentData is not None:
-                        output_content = dash_table.DataTable(
-                            data=varyingComponentData.to_dict('records'),
-                            columns=[{"name": i, "id": i} for i in varyingComponentData.columns],
-                            page_size=10,
-                            style_table={'overflowX': 'auto'},
-                            style_cell={'textAlign': 'left'},
-                            style_header={'backgroundColor': 'lightgrey', 'fontWeight': 'bold'}
-                        )
+                        tableSource = {
+                            'folder': selectedFolder, 'network': tabulateNetwork, 'component': selectedComponent,
+                            'attribute': selectedAttribute, 'aggregation': aggregation, 'keys': selectedKeys, 'window': window
+                        }
+                        output_content = create_table(table_columns(varyingComponentData))
         elif dataType == "varying" and selectedAttribute:            
             showPlotLabel = visibleLabel
             showPlotWindowBtn = visibleButton
-            if button_id == "plot-done" and len(plotValue) > 0:
+            # A new aggregation, key selection, plot mode or window re-plots the comparison that is already shown
+            replot = button_id in ("aggregation-dropdown", "keyselect-dropdown", "plotmode-radio", "snapshot-window") and plotVis == visiblePlot
+            if (button_id == "plot-done" or replot) and len(plotValue) > 0:
                 tableValue = None
                 showPlot = visiblePlot
                 showOutput = hidden
-                for network in plotValue:
-                    network_data.load_network(selectedFolder, network)
-                    varyingComponentData = network_data.get_varying_data(network, selectedComponent, selectedAttribute)
-                    if networkNames:
-                        networkNames += f", '{network}'"
-                    else:
-                        networkNames += f"'{network}'"
-                                        
-                    if varyingComponentData is not None:                        
-                        x_axis_data = varyingComponentData.iloc[:, 0]
-                        y_columns = varyingComponentData.columns[1:]
-                        for column in y_columns:
-                            fig.add_trace(go.Scatter(
-                                x=x_axis_data,
-                                y=varyingComponentData[column],
-                                mode='lines',
-                                name=f"{column} ({network})"
-                            ))
-                    else:
-                        showOutput = visible
-                        output_content = html.Div("Error plotting. Network is empty.")
-                fig.update_layout(title={"text": f"Comparing Attribute: ['{selectedAttribute}'] for Network/s: [{networkNames}]"})
+                plotSource = {
+                    'folder': selectedFolder, 'networks': plotValue, 'component': selectedComponent, 'attribute': selectedAttribute,
+                    'aggregation': aggregation, 'keys': selectedKeys, 'mode': plotMode, 'window': window
+                }
+
+                # The figure is built by a background job and delivered by poll_jobs
+                job = job_manager.submit(
+                    ('plot', json.dumps(plotSource, sort_keys=True)), plotValue,
+                    plot_networks_job, plotSource
+                )
+                if job_manager.synchronous:
+                    job.finished.wait()
+                if job.status == 'done':
+                    fig, emptyNetworks = job.result
+                    job_manager.forget(job.id)
+                elif job.status == 'failed':
+                    fig = go.Figure(layout={"title": f"Error plotting: {job.error}"})
+                    job_manager.forget(job.id)
+                else:
+                    plotJob = job.id
+                    fig = go.Figure(layout={"title": "Loading networks to plot..."})
 
     return (
         output_content, fig, attributeOptions, tableValue, plotValue, 0,
-        showOutput, showPlot, showAttrDropdown, showAttrLabel, showPlotWindowBtn, showPlotLabel
+        showOutput, showPlot, showAttrDropdown, showAttrLabel, showPlotWindowBtn, showPlotLabel, tableSource, plotSource, plotJob
+    )
+
+
+
+'''     Re-plots a Finer Slice of the Data when the Graph is Zoomed
+_______________________________________________________________________'''
+@app.callback(
+    Output('data-graph', 'figure', allow_duplicate=True),
+    Input('data-graph', 'relayoutData'),
+    State('plot-source', 'data'),
+    prevent_initial_call=True
+)
+def zoom_plot(relayoutData, plotSource):
+    if not plotSource or not relayoutData:
+        return dash.no_update
+    # The plot source comes back from the browser, so its folder and networks are checked like a table source
+    plotSource = checked_table_source(plotSource)
+    if not plotSource:
+        return dash.no_update
+    # Side-by-side heatmaps have an x axis each (xaxis, xaxis2, ...), they all zoom together
+    axes = sorted({key.split('.')[0] for key in relayoutData if key.startswith('xaxis')})
+    axis = axes[0] if axes else None
+    if f'{axis}.range[0]' in relayoutData:
+        x_range = (relayoutData[f'{axis}.range[0]'], relayoutData[f'{axis}.range[1]'])
+    elif f'{axis}.range' in relayoutData:
+        x_range = tuple(relayoutData[f'{axis}.range'])
+    elif relayoutData.get(f'{axis}.autorange'):
+        x_range = None
+    else:
+        return dash.no_update
+    fig = go.Figure()
+    plot_networks(fig, plotSource, x_range)
+    return fig
+
+
+
+'''     Polls the Background Jobs, Shows their Progress and Delivers the Finished Plot
+_________________________________________________________________________________________'''
+@app.callback(
+    Output('job-interval', 'disabled'),
+    [
+        Input('load-job', 'data'),
+        Input('plot-job', 'data')
+    ]
+)
+def start_job_polling(loadJob, plotJob):
+    return not (loadJob or plotJob)
+
+
+@app.callback(
+    [
+        Output('data-graph', 'figure', allow_duplicate=True),
+        Output('job-status', 'children'),
+        Output('load-job', 'data', allow_duplicate=True),
+        Output('plot-job', 'data', allow_duplicate=True)
+    ],
+    [
+        Input('job-interval', 'n_intervals')
+    ],
+    [
+        State('load-job', 'data'),
+        State('plot-job', 'data')
+    ],
+    prevent_initial_call=True
+)
+def poll_jobs(intervals, loadJob, plotJob):
+    fig = dash.no_update
+    messages = []
+
+    job = job_manager.get(loadJob)
+    if job is None or job.status != 'running':
+        job_manager.forget(loadJob)
+        loadJob = None
+    else:
+        messages.append(job_progress(job, "Loading networks"))
+
+    job = job_manager.get(plotJob)
+    if job is not None and job.status == 'running':
+        messages.append(job_progress(job, "Loading networks to plot"))
+    elif job is not None:
+        if job.status == 'done':
+            fig, emptyNetworks = job.result
+            if emptyNetworks:
+                messages.append("Error plotting. Network is empty.")
+        elif job.status == 'failed':
+            messages.append(f"Error plotting: {job.error}")
+        job_manager.forget(plotJob)
+        plotJob = None
+    else:
+        plotJob = None
+
+    return fig, [html.Div(message) for message in messages], loadJob, plotJob
+
+
+'''     Cancels Background Jobs when their Networks are no Longer Selected
+_____________________________________________________________________________'''
+@app.callback(
+    [
+        Output('load-job', 'data', allow_duplicate=True),
+        Output('plot-job', 'data', allow_duplicate=True)
+    ],
+    [
+        Input('network-dropdown', 'value'),
+        Input('plotselect-dropdown', 'value')
+    ],
+    [
+        State('load-job', 'data'),
+        State('plot-job', 'data')
+    ],
+    prevent_initial_call=True
+)
+def cancel_jobs(selectedNetworks, plotNetworks, loadJob, plotJob):
+    outputs = []
+    for jobId, selection in ((loadJob, selectedNetworks), (plotJob, plotNetworks)):
+        job = job_manager.get(jobId)
+        if job is not None and job.status == 'running' and job.networks != list(selection or []):
+            job_manager.cancel(jobId)
+            outputs.append(None)
+        else:
+            outputs.append(dash.no_update)
+    return outputs
+
+
+
+'''     Serves the Visible Page of the Table when it is Paged, Sorted or Filtered
+___________________________________________________________________________________'''
+@app.callback(
+    [
+        Output('component-table', 'data'),
+        Output('component-table', 'page_count')
+    ],
+    [
+        Input('component-table', 'page_current'),
+        Input('component-table', 'page_size'),
+        Input('component-table', 'sort_by'),
+        Input('component-table', 'filter_query')
+    ],
+    [
+        State('table-source', 'data')
+    ]
+)
+def update_table_page(pageCurrent, pageSize, sortBy, filterQuery, tableSource):
+    if not tableSource:
+        return [], 1
+    tableSource = checked_table_source(tableSource)
+    if not tableSource:
+        return [], 1
+    # Another server worker may have shown the table, so its networks are loaded here if this worker has not got them
+    networks = tableSource.get('networks') or [tableSource['network']]
+    network_data.networks.pin(networks, 'table')
+    dict(network_data.load_networks(tableSource['folder'], networks))
+    if tableSource.get('view') == 'statistics':
+        return network_data.get_statistics_page(
+            tableSource['networks'], tableSource['component'], tableSource['attribute'],
+            pageCurrent or 0, pageSize or 10, sortBy, filterQuery, tableSource['aggregation'], tableSource['keys'], tableSource.get('window')
+        )
+    if 'networks' in tableSource:
+        return network_data.get_diff_page(
+            tableSource['networks'], tableSource['component'],
+            pageCurrent or 0, pageSize or 10, sortBy, filterQuery
+        )
+    return network_data.get_table_page(
+        tableSource['network'], tableSource['component'], tableSource['attribute'],
+        pageCurrent or 0, pageSize or 10, sortBy, filterQuery, tableSource.get('aggregation'), tableSource.get('keys'), tableSource.get('window')
     )
 
 
 
+'''     Links to Download the Whole Table that is Shown (streamed by the /download route)
+__________________________________________________________________________________________'''
+@app.callback(
+    Output('download-links', 'children'),
+    Input('table-source', 'data')
+)
+def update_download_links(tableSource):
+    if not tableSource:
+        return []
+    source = urllib.parse.quote(json.dumps(tableSource))
+    return [
+        html.A("Download CSV", href=app.get_relative_path(f"/download?format=csv&source={source}"), style={'marginRight': '15px'}),
+        html.A("Download Parquet", href=app.get_relative_path(f"/download?format=parquet&source={source}"))
+    ]
+
+
+
+'''     Lists the Keys (Component Names) of the Selected Networks to Subset Tables and Plots
+_____________________________________________________________________________________________'''
+@app.callback(
+    [
+        Output('keyselect-dropdown', 'options'),
+        Output('keyselect-dropdown', 'value'),
+        Output('keyselect-dropdown', 'style'),
+        Output('keyselect-label', 'style')
+    ],
+    [
+        Input('component-dropdown', 'value'),
+        Input('datatype-dropdown', 'value')
+    ],
+    [
+        State('folder-dropdown', 'value'),
+        State('network-dropdown', 'value'),
+        State('keyselect-dropdown', 'value')
+    ]
+)
+def update_key_options(selectedComponent, dataType, selectedFolder, allNetworks, selectedKeys):
+    if not selectedComponent or not allNetworks or dataType == "diff":
+        return [], [], hiddenDropdown, hiddenLabel
+
+    # The names come from the folder's metadata index, no network is loaded to list them
+    networkIndex = network_data.get_index(network_folder_path(selectedFolder), update=False)
+    keys = {}
+    for network_filename in allNetworks:
+        keys.update(dict.fromkeys(networkIndex.get_component_names(network_filename, selectedComponent) or []))
+    keyOptions = [{'label': str(key), 'value': key} for key in keys]
+
+    # Keys that still exist stay selected when only the data type changes
+    selectedKeys = [key for key in (selectedKeys or []) if key in keys]
+    return keyOptions, selectedKeys, visibleDropdown, visibleLabel
+
+
+
+'''     Shows the Aggregation Dropdown and Snapshot Window with the Attribute Dropdown
+_____________________________________________________________________________________'''
+@app.callback(
+    [
+        Output('aggregation-dropdown', 'style'),
+        Output('aggregation-label', 'style'),
+        Output('snapshot-window', 'style'),
+        Output('window-label', 'style')
+    ],
+    [
+        Input('attribute-dropdown', 'style')
+    ]
+)
+def update_aggregation_visibility(attrDropdownVis):
+    if attrDropdownVis and attrDropdownVis.get('display') == 'block':
+        return visibleDropdown, visibleLabel, visibleDropdown, visibleLabel
+    return hiddenDropdown, hiddenLabel, hiddenDropdown, hiddenLabel
+
+
+'''     Limits the Snapshot Window to the Snapshots of the Selected Networks (from the index)
+__________________________________________________________________________________________'''
+@app.callback(
+    [
+        Output('snapshot-window', 'min_date_allowed'),
+        Output('snapshot-window', 'max_date_allowed'),
+        Output('snapshot-window', 'initial_visible_month')
+    ],
+    [
+        Input('network-dropdown', 'value')
+    ],
+    [
+        State('folder-dropdown', 'value')
+    ]
+)
+def update_window_range(allNetworks, selectedFolder):
+    if not allNetworks or not selectedFolder:
+        return None, None, None
+    networkIndex = network_data.get_index(network_folder_path(selectedFolder), update=False)
+    starts, ends = [], []
+    for network in allNetworks:
+        snapshotRange = networkIndex.get_snapshot_range(network)
+        if snapshotRange and snapshotRange[1]:
+            starts.append(pd.to_datetime(snapshotRange[1], errors='coerce'))
+            ends.append(pd.to_datetime(snapshotRange[2], errors='coerce'))
+    # Snapshots that are not dates leave the picker open, the window is then not applied
+    if not starts or pd.isna(starts).any() or pd.isna(ends).any():
+        return None, None, None
+    return str(min(starts).date()), str(max(ends).date()), str(min(starts).date())
+
+
+
 '''     Shows or Hides Multiple Dropdowns when the Data Type Dropdown is Changed
 _________________________________________________________________________________________________________________'''
 
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# network_reader.py is a module in the repository root, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
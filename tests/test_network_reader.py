@@ -0,0 +1,170 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import network_reader as nr
+
+
+'''     diff_static_frames
+___________________________'''
+def test_diff_ignores_changes_within_tolerance():
+    base = pd.DataFrame({'p_nom': [100.0, 200.0]}, index=pd.Index(['g0', 'g1'], name='Generator'))
+    other = pd.DataFrame({'p_nom': [100.0 * (1 + 1e-9), 250.0]}, index=base.index)
+    diff = nr.diff_static_frames({'a': base, 'b': other})
+    assert list(diff.index) == ['g1']
+    assert list(diff['status']) == ['changed']
+    assert list(diff['p_nom (a)']) == [200.0]
+    assert list(diff['p_nom (b)']) == [250.0]
+
+
+def test_diff_respects_custom_tolerances():
+    base = pd.DataFrame({'p_nom': [100.0]}, index=pd.Index(['g0'], name='Generator'))
+    other = pd.DataFrame({'p_nom': [100.5]}, index=base.index)
+    assert len(nr.diff_static_frames({'a': base, 'b': other})) == 1
+    assert len(nr.diff_static_frames({'a': base, 'b': other}, rtol=0.01)) == 0
+
+
+def test_diff_reports_added_and_removed_rows():
+    base = pd.DataFrame({'bus': ['b0', 'b1']}, index=pd.Index(['g0', 'g1'], name='Generator'))
+    other = pd.DataFrame({'bus': ['b0', 'b2']}, index=pd.Index(['g0', 'g2'], name='Generator'))
+    diff = nr.diff_static_frames({'a': base, 'b': other})
+    assert diff['status'].to_dict() == {'g1': 'removed in b', 'g2': 'added in b'}
+    # Rows only one network has are not compared cell by cell
+    assert 'bus (a)' not in diff.columns
+
+
+def test_diff_treats_nan_as_equal():
+    base = pd.DataFrame(
+        {'ramp_limit_up': [np.nan, 1.0], 'carrier': [None, 'gas']}, index=pd.Index(['g0', 'g1'], name='Generator')
+    )
+    other = base.copy()
+    assert nr.diff_static_frames({'a': base, 'b': other}).empty
+
+
+def test_diff_shows_only_differing_columns_for_every_network():
+    base = pd.DataFrame({'p_nom': [1.0], 'carrier': ['gas']}, index=pd.Index(['g0'], name='Generator'))
+    second = pd.DataFrame({'p_nom': [1.0], 'carrier': ['coal']}, index=base.index)
+    third = pd.DataFrame({'p_nom': [1.0], 'carrier': ['gas']}, index=base.index)
+    diff = nr.diff_static_frames({'a': base, 'b': second, 'c': third})
+    assert list(diff.columns) == ['status', 'carrier (a)', 'carrier (b)', 'carrier (c)']
+
+
+'''     summarize_frame and combine_statistics
+_______________________________________________'''
+def test_summarize_ignores_nan():
+    frame = pd.DataFrame({'g0': [1.0, 2.0, 3.0, np.nan], 'g1': [4.0, 4.0, 4.0, 4.0]})
+    statistics = nr.summarize_frame(frame)
+    assert statistics.loc['g0', 'count'] == 3
+    assert statistics.loc['g0', 'mean'] == 2.0
+    assert statistics.loc['g0', 'p50'] == 2.0
+    assert statistics.loc['g0', 'sum'] == 6.0
+    assert statistics.loc['g1', 'mean/max'] == 1.0
+
+
+def test_summarize_zero_peak_has_no_ratio():
+    statistics = nr.summarize_frame(pd.DataFrame({'g0': [0.0, 0.0]}))
+    assert np.isnan(statistics.loc['g0', 'mean/max'])
+
+
+def test_statistics_table_columns_match_its_records():
+    statistics = nr.summarize_frame(pd.DataFrame({'g0': [1.0, 2.0]}))
+    table = nr.sanitize_table(nr.combine_statistics({'a.h5': statistics, 'b.h5': statistics}))
+    assert list(table.columns) == ['key', 'statistic', 'a.h5', 'b.h5']
+    assert set(nr.table_records(table)[0]) == set(table.columns)
+
+
+'''     window_positions and select_window
+___________________________________________'''
+def test_window_is_a_slice_of_sorted_snapshots():
+    snapshots = pd.date_range('2030-01-01', periods=10, freq='h')
+    assert nr.window_positions(snapshots, ['2030-01-01 02:00', '2030-01-01 05:00']) == slice(2, 5)
+    assert nr.window_positions(snapshots, [None, '2030-01-01 03:00']) == slice(0, 3)
+
+
+def test_window_is_searched_within_every_period():
+    timesteps = pd.date_range('2030-01-01', periods=4, freq='h')
+    snapshots = pd.MultiIndex.from_product([[2030, 2040], timesteps], names=['period', 'timestep'])
+    positions = nr.window_positions(snapshots, ['2030-01-01 01:00', '2030-01-01 03:00'])
+    assert list(positions) == [1, 2, 5, 6]
+
+
+def test_window_is_not_applied_to_snapshots_that_are_not_dates():
+    frame = pd.DataFrame({'g0': range(10)})
+    assert nr.window_positions(frame.index, ['2030-01-01', None]) is None
+    assert len(nr.select_window(frame, ['2030-01-01', None])) == 10
+
+
+def test_window_rows_of_an_empty_window():
+    assert nr.window_rows(10, slice(4, 4)) is None
+    assert nr.window_rows(10, np.array([2, 3, 7])) == (2, 7)
+
+
+
+'''     Lazy and Columnar Reads Match a Full Import
+_______________________________________________'''
+def write_network(path, snapshots, investment_periods=None):
+    import pypsa
+    network = pypsa.Network()
+    network.set_snapshots(snapshots)
+    if investment_periods:
+        network.set_investment_periods(investment_periods)
+    network.add('Bus', ['b0', 'b1'], v_nom=380.0)
+    network.add('Generator', ['g0', 'g1', 'g2'], bus=['b0', 'b1', 'b1'], p_nom=[10.0, 20.0, 30.0], carrier='gas')
+    network.add('Line', ['l0'], bus0='b0', bus1='b1', x=0.1, s_nom=100.0)
+    values = np.arange(len(network.snapshots) * 3, dtype=float).reshape(-1, 3)
+    network.generators_t.p_max_pu = pd.DataFrame(values / values.max(), index=network.snapshots, columns=['g0', 'g1', 'g2'])
+    network.export_to_hdf5(path)
+
+
+NETWORKS = {
+    'hourly.h5': lambda path: write_network(path, pd.date_range('2030-01-01', periods=24, freq='h')),
+    'periods.h5': lambda path: write_network(
+        path, pd.MultiIndex.from_product([[2030, 2040], pd.date_range('2030-01-01', periods=12, freq='h')]), [2030, 2040]
+    ),
+    'integer.h5': lambda path: write_network(path, range(10))
+}
+
+
+@pytest.fixture(scope='module')
+def network_folder(tmp_path_factory):
+    folder = tmp_path_factory.mktemp('networks')
+    for filename, write in NETWORKS.items():
+        write(folder / filename)
+    return folder
+
+
+@pytest.mark.parametrize('network_filename', list(NETWORKS))
+@pytest.mark.parametrize('mode', ['lazy', 'columnar'])
+def test_lazy_and_columnar_reads_match_a_full_import(network_folder, network_filename, mode):
+    if mode == 'columnar' and nr.pa is None:
+        pytest.skip("the columnar cache needs pyarrow")
+    full = nr.NetworkData()
+    other = nr.NetworkData(lazy=True, columnar=mode == 'columnar')
+    for network_data in (full, other):
+        network_data.load_network(network_folder, network_filename)
+
+    for component, attr in [('Generator', None), ('Bus', None), ('Line', None), ('Generator', 'p_max_pu')]:
+        pd.testing.assert_frame_equal(
+            other.get_table_frame(network_filename, component, attr),
+            full.get_table_frame(network_filename, component, attr)
+        )
+
+
+'''     NetworkPrefetcher
+_________________________'''
+def test_prefetch_stops_at_the_memory_budget(network_folder):
+    network_data = nr.NetworkData(lazy=True)
+    network_data.load_network(network_folder, 'hourly.h5')
+    network_data.networks.budget = int(network_data.networks.memory() * 1.5)
+    prefetcher = nr.NetworkPrefetcher(network_data, workers=2, enabled=True)
+    prefetcher.start(network_folder, list(NETWORKS))
+    while prefetcher.is_active():
+        time.sleep(0.05)
+
+    assert network_data.networks.memory() <= network_data.networks.budget
+    assert 'hourly.h5' in network_data.networks
+    labels = {option['value']: option['label'] for option in prefetcher.labels(list(NETWORKS))}
+    for network_filename in NETWORKS:
+        assert labels[network_filename].endswith('(loaded)') == (network_filename in network_data.networks)